@@ -0,0 +1,197 @@
+# bench_macan.py
+# Benchmark komponen Macan Viewer yang tidak butuh GUI.
+#
+#   python bench_macan.py scan [folder] [--files N] [--repeat R]
+#   python bench_macan.py draft [image.jpg ...] [--size 640x480] [--repeat R]
+#   python bench_macan.py huge [--jobs N]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from glob import glob
+
+import numpy as np
+from PIL import Image
+
+from macan_convert import BatchConverter, draft_for_resize, estimate_job_memory, parse_resolution, transform_image
+from macan_folder import scan_media_folder
+
+# Sama dengan ALL_SUPPORTED_EXTENSIONS di macan_viewer (tanpa import Qt)
+MEDIA_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.webp', '.gif', '.mp4', '.avi', '.mkv', '.mov', '.wmv']
+
+
+def _glob_scan(folder):
+    # Implementasi lama _load_current_folder_files: 2 glob per ekstensi
+    all_files = []
+    for ext in MEDIA_EXTENSIONS:
+        all_files.extend(glob(os.path.join(folder, f"*{ext}")))
+        all_files.extend(glob(os.path.join(folder, f"*{ext.upper()}")))
+    return sorted(list(set(all_files)), key=os.path.basename)
+
+
+def _make_sample_folder(count):
+    folder = tempfile.mkdtemp(prefix="macan_bench_")
+    suffixes = ['.jpg', '.JPG', '.Jpg', '.png', '.webp', '.mp4', '.txt']
+    for i in range(count):
+        open(os.path.join(folder, f"img_{i:06d}{suffixes[i % len(suffixes)]}"), "wb").close()
+    return folder
+
+
+def _best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_scan(args):
+    folder = args.folder
+    created = folder is None
+    if created:
+        folder = _make_sample_folder(args.files)
+    try:
+        glob_time, glob_files = _best_of(lambda: _glob_scan(folder), args.repeat)
+        scan_time, entries = _best_of(lambda: scan_media_folder(folder, MEDIA_EXTENSIONS), args.repeat)
+        print(f"folder: {folder}")
+        print(f"glob x{len(MEDIA_EXTENSIONS) * 2}: {glob_time * 1000:9.2f} ms  {len(glob_files)} files")
+        print(f"scandir x1:  {scan_time * 1000:9.2f} ms  {len(entries)} files (incl. stat)")
+        print(f"speedup:     {glob_time / scan_time if scan_time else float('inf'):9.1f}x")
+        missed = len(entries) - len(glob_files)
+        if missed > 0:
+            print(f"glob missed {missed} mixed-case file(s) (e.g. .Jpg)")
+    finally:
+        if created:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def _make_sample_jpeg(folder, size=(6000, 4000)):
+    # Gradien + pola halus: ukuran file dan kerja decoder mirip foto, bukan noise
+    w, h = size
+    x = np.linspace(0, 8 * np.pi, w, dtype=np.float32)
+    y = np.linspace(0, 6 * np.pi, h, dtype=np.float32)[:, None]
+    r = (127 + 127 * np.sin(x + y)).astype(np.uint8)
+    g = (127 + 127 * np.cos(x * 0.7 - y * 1.3)).astype(np.uint8)
+    b = np.broadcast_to((np.arange(w) * 255 // w).astype(np.uint8), (h, w))
+    path = os.path.join(folder, f"sample_{w}x{h}.jpg")
+    Image.fromarray(np.dstack([r, g, b])).save(path, quality=90)
+    return path
+
+
+def _resize_full(path, size):
+    # Jalur lama convert_image: decode penuh lalu LANCZOS
+    with Image.open(path) as img:
+        img.load()
+        decoded = img.size
+        return img.resize(size, Image.Resampling.LANCZOS), decoded
+
+
+def _resize_draft(path, size):
+    with Image.open(path) as img:
+        draft_for_resize(img, size)
+        img.load()
+        decoded = img.size
+        return transform_image(img, "jpeg", size), decoded
+
+
+def _psnr(a, b):
+    diff = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    mse = np.mean(diff * diff)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def bench_draft(args):
+    size = parse_resolution(args.size)
+    folder = None
+    images = args.images
+    if not images:
+        folder = tempfile.mkdtemp(prefix="macan_bench_")
+        images = [_make_sample_jpeg(folder)]
+    try:
+        print(f"target: {size[0]}x{size[1]}")
+        for path in images:
+            full_time, (full_img, full_decoded) = _best_of(lambda: _resize_full(path, size), args.repeat)
+            draft_time, (draft_img, draft_decoded) = _best_of(lambda: _resize_draft(path, size), args.repeat)
+            full_mb = full_decoded[0] * full_decoded[1] * 3 / (1024 * 1024)
+            draft_mb = draft_decoded[0] * draft_decoded[1] * 3 / (1024 * 1024)
+            print(f"{os.path.basename(path)}")
+            print(f"  full decode + LANCZOS:  {full_time * 1000:9.1f} ms  decode {full_decoded[0]}x{full_decoded[1]}"
+                  f" ({full_mb:.0f} MB)")
+            print(f"  draft + LANCZOS:        {draft_time * 1000:9.1f} ms  decode {draft_decoded[0]}x{draft_decoded[1]}"
+                  f" ({draft_mb:.0f} MB)")
+            print(f"  speedup: {full_time / draft_time if draft_time else float('inf'):.1f}x  "
+                  f"PSNR vs full path: {_psnr(full_img, draft_img.convert(full_img.mode)):.1f} dB")
+    finally:
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_huge(args):
+    """
+    Regression: gambar di atas batas decompression-bomb PIL (~179 MP) harus
+    punya perkiraan memori > 0, berjalan sendirian di bawah MemoryBudget, dan
+    benar-benar terkonversi di mode proses maupun pipeline. Return 1 jika gagal.
+    """
+    folder = tempfile.mkdtemp(prefix="macan_bench_")
+    try:
+        # Mode "1" rata: 210 MP tapi file PNG hanya puluhan KB
+        huge = os.path.join(folder, "huge_15000x14000.png")
+        Image.new("1", (15000, 14000), 1).save(huge)
+        for i in range(4):
+            Image.new("RGB", (1600, 1200), (40 * i, 80, 120)).save(os.path.join(folder, f"small_{i}.png"))
+        files = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        estimate = estimate_job_memory(huge, "Original Size")
+        print(f"estimate {os.path.basename(huge)}: {estimate / (1024 * 1024):.0f} MB")
+        failed = estimate <= 0
+        for pipeline in (False, True):
+            mode = "pipeline" if pipeline else "processes"
+            output = os.path.join(folder, f"out_{mode}")
+            # Batas di bawah perkiraan file besar: ia hanya boleh jalan tanpa job lain
+            engine = BatchConverter(output, "PNG", jobs=args.jobs, stop_on_error=False, pipeline=pipeline,
+                                    memory_limit=max(1, estimate // 2))
+            start = time.perf_counter()
+            stats = engine.run(files)
+            memory = stats.memory.as_dict()
+            alone = stats.memory.peak == stats.memory.largest == estimate
+            print(f"{mode:9s}: {stats.done - stats.failed}/{stats.total} ok in {time.perf_counter() - start:.1f} s, "
+                  f"peak reserved {memory['peak_reserved_mb']} MB, huge ran alone: {alone}")
+            for result in stats.failures:
+                print(f"  FAILED {os.path.basename(result.input_path)}: {result.error}")
+            failed = failed or bool(stats.failed) or not alone
+        print("FAIL" if failed else "OK")
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Macan Viewer benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    scan = sub.add_parser("scan", help="glob() vs os.scandir folder listing")
+    scan.add_argument("folder", nargs="?", help="folder to scan (default: generated temp folder)")
+    scan.add_argument("--files", type=int, default=20000, help="files in the generated folder")
+    scan.add_argument("--repeat", type=int, default=5)
+    scan.set_defaults(func=bench_scan)
+
+    draft = sub.add_parser("draft", help="converter downscale: full JPEG decode vs draft (DCT-scaled) decode")
+    draft.add_argument("images", nargs="*", help="JPEG files (default: generated 6000x4000 sample)")
+    draft.add_argument("--size", default="640x480", help="target WxH")
+    draft.add_argument("--repeat", type=int, default=3)
+    draft.set_defaults(func=bench_draft)
+
+    huge = sub.add_parser("huge", help="convert a 210 MP image (above PIL's decompression-bomb limit) in a batch")
+    huge.add_argument("--jobs", type=int, default=2)
+    huge.set_defaults(func=bench_huge)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
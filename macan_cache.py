@@ -0,0 +1,202 @@
+# macan_cache.py
+# Cache LRU untuk gambar hasil decode, dipakai bersama oleh viewer, slideshow dan filmstrip.
+
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+from PIL import Image
+
+# Faktor reduksi decode yang didukung OpenCV (libjpeg DCT scaling untuk JPEG)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+EXIF_ORIENTATION_TAG = 0x0112
+
+_pil_limit_lock = threading.Lock()
+
+
+def open_unbounded(path):
+    """Image.open tanpa batas decompression-bomb PIL, untuk scan/panorama raksasa milik user."""
+    with _pil_limit_lock:
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+
+def image_header_size(path):
+    """Ukuran (w, h) gambar setelah orientasi EXIF, dibaca dari header tanpa decode."""
+    try:
+        with open_unbounded(path) as img:
+            w, h = img.size
+            if img.getexif().get(EXIF_ORIENTATION_TAG) in (5, 6, 7, 8):
+                w, h = h, w
+            return w, h
+    except Exception:
+        return None
+
+
+class ImageHeaderCache:
+    """
+    Ukuran header (w, h) per (path, mtime, size). GUI thread cukup memanggil
+    os.stat untuk tahu ukuran gambar yang sudah pernah di-probe thread
+    loader/prefetch; parsing header PIL (dan _pil_limit_lock) tidak pernah
+    terjadi di GUI thread saat navigasi.
+    """
+    def __init__(self, limit=4096):
+        self.lock = threading.Lock()
+        self.sizes = OrderedDict()
+        self.limit = limit
+
+    @staticmethod
+    def stat_key(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def get(self, stat_key):
+        """Ukuran yang sudah diketahui untuk stat_key, atau None (belum di-probe)."""
+        if stat_key is None:
+            return None
+        with self.lock:
+            size = self.sizes.get(stat_key)
+            if size is not None:
+                self.sizes.move_to_end(stat_key)
+            return size
+
+    def probe(self, path):
+        """Ukuran dari cache, atau baca header sekarang. Panggil dari thread worker."""
+        key = self.stat_key(path)
+        size = self.get(key)
+        if size is None:
+            size = image_header_size(path)
+            if key is not None and size is not None:
+                with self.lock:
+                    self.sizes[key] = size
+                    while len(self.sizes) > self.limit:
+                        self.sizes.popitem(last=False)
+        return size
+
+
+def pick_reduce_factor(image_size, viewport_size):
+    """Faktor reduksi terbesar yang hasil decode-nya masih >= ukuran tampilan fit-to-window."""
+    if not image_size or not viewport_size:
+        return 1
+    (w, h), (vw, vh) = image_size, viewport_size
+    if w <= 0 or h <= 0 or vw <= 0 or vh <= 0:
+        return 1
+    fit_scale = min(vw / w, vh / h)
+    for factor in (8, 4, 2):
+        if fit_scale * factor <= 1.0:
+            return factor
+    return 1
+
+
+def imread_reduced(path, factor=1):
+    return cv2.imread(path, REDUCED_DECODE_FLAGS.get(factor, cv2.IMREAD_COLOR))
+
+
+class DecodedImageCache:
+    """
+    Cache gambar (numpy array) dengan batas memori dalam MB dan eviction LRU.
+    Key: (path, mtime, size, resolusi decode) sehingga file yang berubah
+    di disk otomatis tidak memakai entry lama.
+    """
+    def __init__(self, budget_mb=512):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path, resolution=1):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size, resolution)
+
+    @staticmethod
+    def key_from_stat(stat_key, resolution=1):
+        """Key cache dari ImageHeaderCache.stat_key, tanpa os.stat kedua."""
+        return None if stat_key is None else stat_key + (resolution,)
+
+    def get(self, key, count_stats=True):
+        if key is None:
+            return None
+        with self.lock:
+            image = self.entries.get(key)
+            if image is None:
+                if count_stats:
+                    self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            if count_stats:
+                self.hits += 1
+            return image
+
+    def contains(self, key):
+        with self.lock:
+            return key is not None and key in self.entries
+
+    def put(self, key, image):
+        if key is None or image is None:
+            return
+        # Array di cache dipakai bersama, jangan sampai diubah in-place
+        image.flags.writeable = False
+        size = image.nbytes
+        with self.lock:
+            if size > self.budget_bytes:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes_held -= old.nbytes
+            self.entries[key] = image
+            self.bytes_held += size
+            self._evict()
+
+    def get_or_load(self, path, loader, resolution=1, count_stats=True):
+        key = self.make_key(path, resolution)
+        image = self.get(key, count_stats)
+        if image is None:
+            image = loader(path)
+            self.put(key, image)
+        return image
+
+    def set_budget_mb(self, budget_mb):
+        with self.lock:
+            self.budget_bytes = int(budget_mb * 1024 * 1024)
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes_held = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_held": self.bytes_held,
+                "budget_bytes": self.budget_bytes,
+                "entries": len(self.entries),
+            }
+
+    def _evict(self):
+        while self.bytes_held > self.budget_bytes and self.entries:
+            _, image = self.entries.popitem(last=False)
+            self.bytes_held -= image.nbytes
@@ -0,0 +1,1053 @@
+# macan_convert.py
+# Mesin konversi gambar tanpa Qt: dipakai ImageConverterWidget dan bisa jalan headless.
+#
+#   python macan_convert.py INPUT... -o OUTPUT_DIR [-f WEBP] [-r 1280x720] [-q 85]
+#                           [--recursive] [--include GLOB] [--exclude GLOB] [--jobs N]
+#                           [--incremental [--hash]] [--pipeline]
+#                           [--keep-going] [--report FAILURES.csv|.json] [--retry FAILURES.csv|.json]
+#                           [--max-memory MB] [--target-size KB]
+#
+# Progress ditulis ke stdout sebagai JSON lines (satu objek per event).
+
+import argparse
+import csv
+import fnmatch
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, UnidentifiedImageError
+
+from macan_cache import open_unbounded
+
+QUALITY_PRESETS = {
+    "Maximum (100)": 100, "Very Good (95)": 95, "Good (85)": 85,
+    "Medium (75)": 75, "Low (50)": 50
+}
+DEFAULT_QUALITY = 85
+QUALITY_FORMATS = ['jpeg', 'jpg', 'webp']
+OUTPUT_FORMATS = ["JPEG", "PNG", "WEBP", "BMP", "GIF"]
+# Sama dengan filter file di ImageConverterWidget
+INPUT_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.bmp", "*.webp", "*.gif"]
+
+# Mode target ukuran file: rentang kualitas yang dicari dan jumlah encode percobaan per putaran
+TARGET_QUALITY_RANGE = (5, 95)
+TARGET_SEARCH_WORKERS = 3
+
+# Manifest batch incremental, disimpan di folder output
+MANIFEST_NAME = ".macan_manifest.json"
+MANIFEST_SAVE_EVERY = 500      # hasil
+MANIFEST_SAVE_INTERVAL = 30.0  # detik
+
+# Mode pipeline: jumlah thread pembaca dan item per consumer yang boleh antre di tiap queue
+PIPELINE_READERS = 2
+PIPELINE_QUEUE_PER_WORKER = 2
+PIPELINE_STAGES = ("read", "transform", "encode")
+PIPELINE_NEXT_STAGE = {"read": "transform", "transform": "encode", "encode": None}
+
+# Scheduler memori: bagian dari RAM tersedia (saat batch mulai) yang boleh dipakai buffer gambar
+MEMORY_BUDGET_FRACTION = 0.6
+JOB_MEMORY_OVERHEAD = 8 * 1024 * 1024
+# Byte per piksel buffer internal Pillow (RGB disimpan 4 byte/piksel)
+PIL_BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1, "I;16": 2, "I;16B": 2, "I;16L": 2}
+
+# skipped=True: output masih valid menurut manifest, file tidak dikonversi ulang
+# quality: kualitas hasil pencarian pada mode target ukuran file
+ConversionResult = namedtuple(
+    "ConversionResult",
+    ["input_path", "output_path", "ok", "error", "bytes_in", "bytes_out", "seconds", "skipped", "quality"],
+    defaults=(False, None))
+# Hasil encode_to_target_size; data = bytes encode (tidak pernah ditulis ke file sementara)
+TargetSizeResult = namedtuple("TargetSizeResult", ["data", "quality", "fits", "trials", "seconds"])
+
+
+def default_jobs():
+    return max(1, os.cpu_count() or 1)
+
+
+def parse_resolution(resolution):
+    """'1280x720 (HD)' -> (1280, 720); 'Original Size' / None -> None."""
+    if not resolution or resolution == "Original Size":
+        return None
+    try:
+        res_parts = resolution.split(' ')[0].split('x')
+        return int(res_parts[0]), int(res_parts[1])
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid resolution format: {resolution}")
+
+
+def quality_value(quality_str):
+    """Preset combo ('Good (85)') atau angka ('85') -> int kualitas."""
+    if isinstance(quality_str, int):
+        return quality_str
+    if quality_str in QUALITY_PRESETS:
+        return QUALITY_PRESETS[quality_str]
+    try:
+        return int(quality_str)
+    except (TypeError, ValueError):
+        return DEFAULT_QUALITY
+
+
+def output_path_for(input_path, output_dir, out_format):
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{base_name}.{out_format.lower()}")
+
+
+def convert_image(input_path, output_path, out_format, resolution, quality_str, progress=None):
+    """
+    Buka, resize (opsional) dan simpan satu gambar. `progress(value, stage)`
+    dipanggil dengan stage 'processing_image' setelah decode/resize.
+    Exception diteruskan ke caller. Return jumlah byte file output.
+    """
+    new_size = parse_resolution(resolution)
+    # Tanpa batas decompression-bomb: file raksasa milik user dijaga MemoryBudget, bukan ditolak
+    with open_unbounded(input_path) as img:
+        draft_for_resize(img, new_size)
+        img = transform_image(img, out_format, new_size)
+
+        if progress:
+            progress(50, "processing_image")
+
+        img.save(output_path, **save_options_for(out_format, quality_str))
+    return os.path.getsize(output_path)
+
+
+def draft_for_resize(img, new_size):
+    """
+    Panggil sebelum decode. Untuk JPEG yang diperkecil, decoder langsung
+    menghasilkan skala 1/2, 1/4 atau 1/8 (DCT scaling) yang masih >= target,
+    jadi LANCZOS hanya perlu meresample < 2x dan buffer full-size tidak pernah
+    dibuat. Format lain tidak terpengaruh. Return True jika draft dipakai.
+    """
+    if new_size is None or img.format != "JPEG":
+        return False
+    return img.draft(img.mode, new_size) is not None
+
+
+def transform_image(img, out_format, new_size):
+    """Resize (opsional) dan konversi mode warna yang dibutuhkan format output."""
+    if new_size is not None:
+        # reducing_gap: format tanpa draft (PNG, WEBP, ...) diperkecil dulu dengan box reduce
+        # bilangan bulat, lalu LANCZOS; gap 3 praktis tidak bisa dibedakan dari LANCZOS penuh
+        img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if out_format.lower() in ['jpeg', 'jpg']:
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGB')
+    return img
+
+
+def save_options_for(out_format, quality_str):
+    save_options = {}
+    if out_format.lower() in QUALITY_FORMATS:
+        save_options['quality'] = quality_value(quality_str)
+    return save_options
+
+
+def encode_image(img, out_format, quality_str):
+    """Encode ke bytes di memori (format PIL ditentukan dari ekstensi output)."""
+    pil_format = Image.registered_extensions().get(f".{out_format.lower()}", out_format.upper())
+    buffer = io.BytesIO()
+    img.save(buffer, format=pil_format, **save_options_for(out_format, quality_str))
+    return buffer.getvalue()
+
+
+def encode_to_target_size(img, out_format, max_bytes, workers=TARGET_SEARCH_WORKERS):
+    """
+    Cari kualitas JPEG/WEBP tertinggi yang hasil encode-nya <= max_bytes,
+    seluruhnya di memori. Tiap putaran meng-encode `workers` kualitas yang
+    tersebar rata di rentang tersisa secara bersamaan (Pillow melepas GIL
+    saat encode), lalu rentang dipersempit di antara kualitas muat tertinggi
+    dan kualitas terlalu besar terendah; workers=1 berarti binary search biasa.
+    Jika kualitas terendah pun tidak muat, hasilnya encode kualitas terendah
+    dengan fits=False.
+    """
+    if out_format.lower() not in QUALITY_FORMATS:
+        raise ValueError(f"Target file size needs JPEG or WEBP output, not {out_format.upper()}")
+    start = time.perf_counter()
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    low, high = TARGET_QUALITY_RANGE
+    encoded = {}
+    best = None
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while low <= high:
+            count = min(workers, high - low + 1)
+            qualities = sorted({low + (high - low) * (i + 1) // (count + 1) for i in range(count)})
+            if executor:
+                # Image.save menyimpan opsi encode di objek image: tiap thread butuh salinannya sendiri
+                datas = list(executor.map(lambda q: encode_image(img.copy(), out_format, q), qualities))
+            else:
+                datas = [encode_image(img, out_format, q) for q in qualities]
+            encoded.update(zip(qualities, datas))
+            for quality, data in zip(qualities, datas):
+                if len(data) <= max_bytes:
+                    best = quality if best is None else max(best, quality)
+            if best is not None:
+                low = max(low, best + 1)
+            too_big = [q for q, data in zip(qualities, datas) if len(data) > max_bytes and q >= low]
+            if too_big:
+                high = min(too_big) - 1
+    finally:
+        if executor:
+            executor.shutdown()
+    quality = best if best is not None else TARGET_QUALITY_RANGE[0]
+    return TargetSizeResult(encoded[quality], quality, best is not None, len(encoded), time.perf_counter() - start)
+
+
+def convert_image_to_target(input_path, output_path, out_format, resolution, target_kb, progress=None,
+                            workers=TARGET_SEARCH_WORKERS):
+    """
+    Seperti convert_image, tapi kualitas dicari agar file <= target_kb.
+    Hanya hasil akhir yang ditulis; ValueError jika target tidak tercapai.
+    Return TargetSizeResult.
+    """
+    new_size = parse_resolution(resolution)
+    with open_unbounded(input_path) as img:
+        draft_for_resize(img, new_size)
+        img = transform_image(img, out_format, new_size)
+        if progress:
+            progress(50, "processing_image")
+        result = encode_to_target_size(img, out_format, target_kb * 1024, workers)
+    if not result.fits:
+        raise ValueError(target_size_error(target_kb, result))
+    with open(output_path, "wb") as f:
+        f.write(result.data)
+    return result
+
+
+def target_size_error(target_kb, result):
+    return (f"Cannot reach {target_kb} KB: smallest is {len(result.data) / 1024:.0f} KB "
+            f"at quality {result.quality}")
+
+
+def collect_inputs(paths, recursive=False, include=None, exclude=None):
+    """
+    File dan folder -> daftar (input_path, subfolder relatif). Folder discan
+    (rekursif jika diminta); glob include/exclude dicocokkan case-insensitive
+    ke nama file maupun path relatif terhadap folder input. Path yang tidak
+    ada menghasilkan FileNotFoundError, bukan diabaikan diam-diam.
+    """
+    include = [pattern.lower() for pattern in (include or INPUT_PATTERNS)]
+    exclude = [pattern.lower() for pattern in (exclude or [])]
+
+    def matches(name, rel_path, patterns):
+        name, rel_path = name.lower(), rel_path.replace(os.sep, "/").lower()
+        return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(rel_path, p) for p in patterns)
+
+    collected = []
+    for path in paths:
+        if os.path.isfile(path):
+            collected.append((path, ""))
+            continue
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"input not found: {path}")
+        for folder, dirs, names in os.walk(path):
+            dirs.sort()
+            rel_dir = os.path.relpath(folder, path)
+            rel_dir = "" if rel_dir == os.curdir else rel_dir
+            for name in sorted(names):
+                rel_path = os.path.join(rel_dir, name)
+                if matches(name, rel_path, include) and not matches(name, rel_path, exclude):
+                    collected.append((os.path.join(folder, name), rel_dir))
+            if not recursive:
+                break
+    return collected
+
+
+# Event stop milik batch, diwariskan ke proses worker lewat initializer pool
+_worker_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _convert_job(input_path, output_dir, out_format, resolution, quality_str, target_kb=None):
+    # Berjalan di proses worker: semua error dikembalikan sebagai data, bukan exception.
+    # Return None jika batch sudah di-stop sebelum job ini sempat mulai.
+    if _worker_stop_event is not None and _worker_stop_event.is_set():
+        return None
+    start = time.perf_counter()
+    output_path = output_path_for(input_path, output_dir, out_format)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        bytes_in = os.path.getsize(input_path)
+        if target_kb:
+            # Pool sudah memakai semua core: pencarian kualitas per file berjalan sekuensial
+            target = convert_image_to_target(input_path, output_path, out_format, resolution, target_kb, workers=1)
+            return ConversionResult(input_path, output_path, True, None, bytes_in, len(target.data),
+                                    time.perf_counter() - start, quality=target.quality)
+        bytes_out = convert_image(input_path, output_path, out_format, resolution, quality_str)
+        return ConversionResult(input_path, output_path, True, None, bytes_in, bytes_out,
+                                time.perf_counter() - start)
+    except Exception as e:
+        return ConversionResult(input_path, output_path, False, str(e), 0, 0, time.perf_counter() - start)
+
+
+def available_memory():
+    """RAM yang masih bisa dipakai (byte), atau None jika tidak diketahui."""
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        # MemAvailable ikut menghitung page cache yang bisa dibebaskan
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_job_memory(input_path, resolution):
+    """
+    Perkiraan puncak memori satu konversi (byte), hanya dari header file:
+    buffer decode (sudah memperhitungkan draft JPEG), buffer antara dan hasil
+    LANCZOS (atau salinan konversi mode jika tidak di-resize), plus bytes
+    file input. Sengaja sedikit berlebih; 0 jika header tidak terbaca.
+    """
+    try:
+        # Panorama 200 MP melewati batas decompression-bomb PIL (Error di atas ~179 MP,
+        # bukan hanya Warning); ini hanya baca header, jadi batasnya dilepas
+        with open_unbounded(input_path) as img:
+            width, height = img.size
+            image_format, mode = img.format, img.mode
+        file_size = os.path.getsize(input_path)
+    except Exception:
+        return 0
+    bytes_per_pixel = PIL_BYTES_PER_PIXEL.get(mode, 4)
+    new_size = parse_resolution(resolution)
+    if new_size is None:
+        return width * height * bytes_per_pixel * 2 + file_size + JOB_MEMORY_OVERHEAD
+    target_w, target_h = new_size
+    scale = 1
+    if image_format == "JPEG":
+        for factor in (8, 4, 2):
+            if -(-width // factor) >= target_w and -(-height // factor) >= target_h:
+                scale = factor
+                break
+    decoded_w, decoded_h = -(-width // scale), -(-height // scale)
+    decoded = decoded_w * decoded_h * bytes_per_pixel
+    # LANCZOS dua pass: horizontal (target_w x decoded_h) lalu vertikal
+    resample = (target_w * decoded_h + target_w * target_h) * 4
+    return decoded + resample + file_size + JOB_MEMORY_OVERHEAD
+
+
+class MemoryBudget:
+    """
+    Admission control batch: job baru hanya boleh mulai jika total perkiraan
+    memori job yang sedang berjalan masih di bawah `limit`. Job yang sendirian
+    sudah melebihi limit tetap jalan, tapi hanya ketika tidak ada job lain
+    (dan tidak ada yang boleh ikut masuk sampai ia selesai). Antrean FIFO,
+    jadi file besar tidak kelaparan oleh file kecil di belakangnya.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.reserved = 0
+        self.running = 0
+        self.peak = 0
+        self.waits = 0
+        self.largest = 0
+
+    def fits(self, estimate):
+        return self.running == 0 or self.reserved + estimate <= self.limit
+
+    def acquire(self, estimate):
+        self.reserved += estimate
+        self.running += 1
+        self.peak = max(self.peak, self.reserved)
+        self.largest = max(self.largest, estimate)
+
+    def release(self, estimate):
+        self.reserved -= estimate
+        self.running -= 1
+
+    def as_dict(self):
+        mb = 1024 * 1024
+        return {
+            "limit_mb": round(self.limit / mb, 1), "peak_reserved_mb": round(self.peak / mb, 1),
+            "largest_job_mb": round(self.largest / mb, 1), "waits": self.waits,
+        }
+
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    """
+    Catatan konversi sebelumnya: input (size, mtime, opsional sha1) + parameter
+    konversi -> output (size, mtime). File dilewati jika input dan parameternya
+    sama dan output-nya masih persis seperti yang ditulis batch sebelumnya.
+    Dengan use_hash, input yang mtime-nya berubah tapi isinya sama (mis. habis
+    di-copy/rsync) juga dilewati.
+    """
+    def __init__(self, path, use_hash=False):
+        self.path = path
+        self.use_hash = use_hash
+        self.entries = {}
+        self.dirty = 0
+        self.last_save = time.monotonic()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    @staticmethod
+    def params_key(out_format, resolution, quality_str, target_kb=None):
+        size = parse_resolution(resolution)
+        quality = quality_value(quality_str) if out_format.lower() in QUALITY_FORMATS else None
+        if target_kb:
+            quality = f"<={target_kb}KB"
+        return f"{out_format.lower()}|{'x'.join(map(str, size)) if size else 'original'}|{quality}"
+
+    def is_up_to_date(self, input_path, output_path, params):
+        entry = self.entries.get(os.path.abspath(input_path))
+        if entry is None or entry.get("params") != params or entry.get("output") != os.path.abspath(output_path):
+            return False
+        try:
+            source, output = os.stat(input_path), os.stat(output_path)
+        except OSError:
+            return False
+        if (output.st_size, output.st_mtime_ns) != (entry.get("output_size"), entry.get("output_mtime")):
+            return False
+        if source.st_size != entry.get("size"):
+            return False
+        if source.st_mtime_ns == entry.get("mtime"):
+            return True
+        if self.use_hash and entry.get("sha1") and _file_sha1(input_path) == entry["sha1"]:
+            entry["mtime"] = source.st_mtime_ns  # percepat pengecekan berikutnya
+            self.dirty += 1
+            return True
+        return False
+
+    def record(self, result, params):
+        key = os.path.abspath(result.input_path)
+        if not result.ok:
+            self.entries.pop(key, None)
+            return
+        try:
+            source, output = os.stat(result.input_path), os.stat(result.output_path)
+        except OSError:
+            return
+        self.entries[key] = {
+            "size": source.st_size, "mtime": source.st_mtime_ns,
+            "sha1": _file_sha1(result.input_path) if self.use_hash else None,
+            "params": params, "output": os.path.abspath(result.output_path),
+            "output_size": output.st_size, "output_mtime": output.st_mtime_ns,
+        }
+        self.dirty += 1
+        if self.dirty >= MANIFEST_SAVE_EVERY or time.monotonic() - self.last_save >= MANIFEST_SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Tulis atomik (file sementara lalu rename) agar batch yang terputus tidak merusak manifest."""
+        if not self.dirty:
+            return
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f)
+            os.replace(temp, self.path)
+            self.dirty = 0
+            self.last_save = time.monotonic()
+        except OSError as e:
+            print(f"Failed to save conversion manifest {self.path}: {e}", file=sys.stderr)
+
+
+class PipelineStats:
+    """
+    Waktu sibuk per stage dan kedalaman queue di depan tiap stage. Utilisasi
+    stage = waktu sibuk / (durasi batch x jumlah thread); stage dengan
+    utilisasi tertinggi (dan queue masuk yang penuh) adalah bottleneck.
+    """
+    def __init__(self, workers):
+        self.workers = dict(workers)
+        self.busy = {stage: 0.0 for stage in PIPELINE_STAGES}
+        self.items = {stage: 0 for stage in PIPELINE_STAGES}
+        # stage -> [jumlah sampel, total kedalaman, kedalaman maksimum, kapasitas]
+        self.queues = {stage: [0, 0, 0, 0] for stage in PIPELINE_STAGES}
+        self.lock = threading.Lock()
+
+    def add_busy(self, stage, seconds):
+        with self.lock:
+            self.busy[stage] += seconds
+            self.items[stage] += 1
+
+    def sample_queue(self, stage, work_queue):
+        depth = work_queue.qsize()
+        with self.lock:
+            sample = self.queues[stage]
+            sample[0] += 1
+            sample[1] += depth
+            sample[2] = max(sample[2], depth)
+            sample[3] = work_queue.maxsize
+
+    def as_dict(self, elapsed):
+        report = {}
+        with self.lock:
+            for stage in PIPELINE_STAGES:
+                samples, total_depth, max_depth, capacity = self.queues[stage]
+                capacity_seconds = elapsed * self.workers[stage]
+                report[stage] = {
+                    "workers": self.workers[stage], "items": self.items[stage],
+                    "busy_seconds": round(self.busy[stage], 3),
+                    "utilization": round(self.busy[stage] / capacity_seconds, 3) if capacity_seconds > 0 else 0.0,
+                    "queue_capacity": capacity,
+                    "queue_avg": round(total_depth / samples, 2) if samples else 0.0,
+                    "queue_max": max_depth,
+                }
+        return report
+
+
+class ConversionPipeline:
+    """
+    Batch dalam satu proses dengan tiga stage yang saling tumpang-tindih:
+    read (baca bytes dari disk) -> transform (decode + resize) -> encode
+    (encode di memori + tulis). Tiap stage punya thread sendiri dan
+    dihubungkan queue terbatas, sehingga memori tetap kecil dan stage yang
+    lambat menahan stage sebelumnya. Decode, resize dan encode Pillow
+    melepas GIL, jadi thread transform/encode berjalan paralel.
+    """
+    def __init__(self, out_format, resolution, quality_str, transformers, encoders=None,
+                 readers=PIPELINE_READERS, target_kb=None):
+        self.out_format = out_format
+        self.new_size = parse_resolution(resolution)
+        self.quality_str = quality_str
+        self.target_kb = target_kb
+        workers = {"read": readers, "transform": transformers, "encode": encoders or max(1, transformers // 2)}
+        self.stats = PipelineStats(workers)
+        self.queues = {stage: queue.Queue(maxsize=PIPELINE_QUEUE_PER_WORKER * count)
+                       for stage, count in workers.items()}
+        # (input_path, ConversionResult) per job; result None jika dibatalkan stop() sebelum selesai
+        self.results = queue.Queue()
+        self.closing = threading.Event()
+        self.threads = []
+
+    def start(self, stop_event):
+        self.stop_event = stop_event
+        handlers = {"read": self._read, "transform": self._transform, "encode": self._encode}
+        for stage in PIPELINE_STAGES:
+            for i in range(self.stats.workers[stage]):
+                thread = threading.Thread(target=self._stage_loop, args=(stage, handlers[stage]),
+                                          name=f"macan-convert-{stage}-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def has_room(self):
+        return not self.queues["read"].full()
+
+    def submit(self, input_path, output_path):
+        self._put("read", (input_path, output_path, time.perf_counter()))
+
+    def close(self):
+        self.closing.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _put(self, stage, item):
+        work_queue = self.queues[stage]
+        work_queue.put(item)
+        self.stats.sample_queue(stage, work_queue)
+
+    def _stage_loop(self, stage, handler):
+        work_queue = self.queues[stage]
+        while True:
+            try:
+                item = work_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.closing.is_set():
+                    return
+                continue
+            input_path, output_path, start = item[:3]
+            if self.stop_event.is_set():
+                # Item yang masih antre di stage mana pun dibuang begitu stop() dipanggil
+                self.results.put((input_path, None))
+                continue
+            busy_start = time.perf_counter()
+            try:
+                output = handler(item)
+            except Exception as e:
+                output = ConversionResult(input_path, output_path, False, str(e), 0, 0,
+                                          time.perf_counter() - start)
+            # Waktu menunggu queue berikutnya yang penuh tidak dihitung sebagai waktu sibuk
+            self.stats.add_busy(stage, time.perf_counter() - busy_start)
+            if isinstance(output, ConversionResult):
+                self.results.put((input_path, output))
+            else:
+                self._put(PIPELINE_NEXT_STAGE[stage], output)
+
+    def _read(self, item):
+        input_path, output_path, start = item
+        with open(input_path, "rb") as f:
+            data = f.read()
+        return input_path, output_path, start, data
+
+    def _transform(self, item):
+        input_path, output_path, start, data = item
+        # Tanpa `with`: jika tidak ada resize, objek yang sama diteruskan ke stage encode
+        try:
+            img = open_unbounded(io.BytesIO(data))
+        except UnidentifiedImageError:
+            # Pesan sama dengan mode proses (path, bukan repr BytesIO)
+            raise UnidentifiedImageError(f"cannot identify image file {input_path!r}") from None
+        draft_for_resize(img, self.new_size)
+        img.load()
+        img = transform_image(img, self.out_format, self.new_size)
+        return input_path, output_path, start, img, len(data)
+
+    def _encode(self, item):
+        input_path, output_path, start, img, bytes_in = item
+        quality = None
+        if self.target_kb:
+            target = encode_to_target_size(img, self.out_format, self.target_kb * 1024, workers=1)
+            if not target.fits:
+                raise ValueError(target_size_error(self.target_kb, target))
+            data, quality = target.data, target.quality
+        else:
+            data = encode_image(img, self.out_format, self.quality_str)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return ConversionResult(input_path, output_path, True, None, bytes_in, len(data),
+                                time.perf_counter() - start, quality=quality)
+
+
+FAILURE_REPORT_FIELDS = ["input", "output", "error"]
+
+
+def write_failure_report(path, failures):
+    """
+    Tulis daftar ConversionResult yang gagal ke `path`: JSON jika ekstensinya
+    .json, selain itu CSV (input, output, error). Return path.
+    """
+    rows = [{"input": r.input_path, "output": r.output_path, "error": r.error} for r in failures]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"failed": len(rows), "files": rows}, f, indent=2)
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FAILURE_REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return path
+
+
+def read_failure_report(path):
+    """Kebalikan write_failure_report: daftar (input_path, output_dir) untuk dicoba ulang."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".json"):
+            rows = json.load(f)["files"]
+        else:
+            rows = list(csv.DictReader(f))
+    return [(row["input"], os.path.dirname(row["output"])) for row in rows]
+
+
+class BatchStats:
+    """Agregat throughput batch: file/s dan MB/s (input) sejak start."""
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        self.pipeline = None  # PipelineStats pada mode pipeline
+        self.memory = None    # MemoryBudget jika scheduler memori aktif
+        self.failures = []    # ConversionResult yang gagal, untuk laporan di akhir batch
+
+    def record(self, result):
+        self.done += 1
+        if result.skipped:
+            self.skipped += 1
+        elif result.ok:
+            self.bytes_in += result.bytes_in
+            self.bytes_out += result.bytes_out
+        else:
+            self.failed += 1
+            self.failures.append(result)
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def files_per_second(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_in / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "total": self.total, "done": self.done, "failed": self.failed, "skipped": self.skipped,
+            "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+            "elapsed": round(self.elapsed, 3),
+            "files_per_second": round(self.files_per_second, 2),
+            "mb_per_second": round(self.mb_per_second, 2),
+            **({"stages": self.pipeline.as_dict(self.elapsed)} if self.pipeline else {}),
+            **({"memory": self.memory.as_dict()} if self.memory else {}),
+        }
+
+
+class BatchConverter:
+    """
+    Konversi banyak file di process pool (`jobs` proses). Hasil per file
+    di-stream lewat `on_result(result, stats)` begitu selesai, tidak menunggu
+    urutan input. Hanya sekitar 2x `jobs` file yang di-submit sekaligus agar
+    batch 100k file tidak membuat 100k future, dan agar stop() cepat berlaku.
+    Dengan pipeline=True batch berjalan di ConversionPipeline (thread per
+    stage, `jobs` thread transform) dan BatchStats.pipeline berisi statistik stage.
+    Di kedua mode job diatur MemoryBudget: `memory_limit` dalam byte, None =
+    MEMORY_BUDGET_FRACTION dari RAM tersedia, 0 = tanpa batas. Dengan
+    target_kb, kualitas tiap file dicari agar output <= target_kb (JPEG/WEBP).
+    """
+    def __init__(self, output_dir, out_format, resolution="Original Size", quality_str=DEFAULT_QUALITY,
+                 jobs=None, stop_on_error=True, incremental=False, use_hash=False, pipeline=False,
+                 memory_limit=None, target_kb=None):
+        self.output_dir = output_dir
+        self.out_format = out_format
+        self.resolution = resolution
+        self.quality_str = quality_str
+        self.jobs = jobs or default_jobs()
+        self.stop_on_error = stop_on_error
+        self.incremental = incremental
+        self.use_hash = use_hash
+        self.pipeline = pipeline
+        self.memory_limit = memory_limit
+        self.target_kb = target_kb
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Batalkan file yang belum mulai (future yang antre dibatalkan, item pipeline
+        dibuang); file yang sedang dikonversi worker dibiarkan selesai.
+        """
+        self.stop_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def run(self, files, on_result=None, output_dirs=None):
+        """
+        Blocking: panggil dari worker thread atau CLI. Return BatchStats.
+        `output_dirs` (opsional) memetakan input -> folder output, untuk
+        mempertahankan struktur subfolder; default semua ke output_dir.
+        """
+        output_dirs = output_dirs or {}
+        parse_resolution(self.resolution)  # validasi sekali, sebelum pool dibuat
+        files = list(files)
+        stats = BatchStats(len(files))
+        if not files:
+            return stats
+
+        manifest = None
+        params = ConversionManifest.params_key(self.out_format, self.resolution, self.quality_str, self.target_kb)
+        if self.incremental:
+            manifest = ConversionManifest(os.path.join(self.output_dir, MANIFEST_NAME), self.use_hash)
+
+        def report(result):
+            stats.record(result)
+            if manifest is not None and not result.skipped:
+                manifest.record(result, params)
+            if on_result:
+                on_result(result, stats)
+            if not result.ok and self.stop_on_error:
+                self.stop()
+
+        pending = iter(files)
+        limit = self.memory_limit
+        if limit is None:
+            available = available_memory()
+            limit = int(available * MEMORY_BUDGET_FRACTION) if available else 0
+        budget = stats.memory = MemoryBudget(limit) if limit else None
+        held = []  # job yang menunggu memori; tetap di depan antrean
+
+        def next_job():
+            """
+            (input_path, output_dir, perkiraan memori) berikutnya yang boleh mulai;
+            None jika input habis atau job berikutnya harus menunggu memori.
+            File yang masih valid menurut manifest langsung dilaporkan.
+            """
+            if held:
+                job = held[0]
+            else:
+                job = None
+                for input_path in pending:
+                    output_dir = output_dirs.get(input_path, self.output_dir)
+                    if manifest is not None:
+                        output_path = output_path_for(input_path, output_dir, self.out_format)
+                        if manifest.is_up_to_date(input_path, output_path, params):
+                            report(ConversionResult(input_path, output_path, True, None, 0, 0, 0.0, True))
+                            continue
+                    estimate = estimate_job_memory(input_path, self.resolution) if budget else 0
+                    job = (input_path, output_dir, estimate)
+                    break
+                if job is None:
+                    return None
+            if budget is not None:
+                if not budget.fits(job[2]):
+                    if not held:
+                        held.append(job)
+                        budget.waits += 1
+                    return None
+                budget.acquire(job[2])
+            held.clear()
+            return job
+
+        def job_start(job):
+            # Job yang diulang setelah pool rusak: memorinya dipesan lagi (job_done sudah melepasnya)
+            if budget is not None:
+                budget.acquire(job[2])
+
+        def job_done(job):
+            if budget is not None:
+                budget.release(job[2])
+
+        def waiting():
+            return bool(held)
+
+        try:
+            if self.pipeline:
+                self._run_pipeline(next_job, job_done, waiting, report, stats)
+            else:
+                self._run_pool(next_job, job_start, job_done, report)
+        finally:
+            if manifest is not None:
+                manifest.save()
+        return stats
+
+    def _run_pool(self, next_job, job_start, job_done, report):
+        # spawn: aman untuk proses induk yang punya thread (Qt, pool thumbnail)
+        context = multiprocessing.get_context("spawn")
+        max_in_flight = self.jobs * 2
+        in_flight = {}  # future -> job
+        # Worker mati (OOM killer, decoder crash) menggagalkan semua future di pool itu,
+        # termasuk file yang tidak bersalah. Job tersebut diulang satu per satu di pool
+        # baru; hanya file yang merusak pool saat berjalan sendirian yang dilaporkan gagal.
+        suspects = []
+        solo = None  # future suspect yang sedang diulang sendirian
+        # Future yang sudah masuk call queue pool tidak bisa di-cancel(); job itu
+        # memeriksa event ini saat mulai dan langsung selesai tanpa konversi.
+        worker_stop = context.Event()
+
+        def new_pool():
+            return ProcessPoolExecutor(max_workers=self.jobs, mp_context=context,
+                                       initializer=_init_worker, initargs=(worker_stop,))
+
+        def submit(job):
+            nonlocal executor
+            args = (_convert_job, job[0], job[1], self.out_format, self.resolution, self.quality_str,
+                    self.target_kb)
+            try:
+                future = executor.submit(*args)
+            except BrokenProcessPool:
+                # Pool rusak karena worker mati; ganti dengan pool baru lalu lanjut
+                executor.shutdown(wait=False)
+                executor = new_pool()
+                future = executor.submit(*args)
+            in_flight[future] = job
+            return future
+
+        executor = new_pool()
+        try:
+            while True:
+                if suspects and not in_flight and not self.stopped:
+                    job = suspects.pop(0)
+                    job_start(job)
+                    solo = submit(job)
+                while not self.stopped and not suspects and solo is None and len(in_flight) < max_in_flight:
+                    job = next_job()
+                    if job is None:
+                        break
+                    submit(job)
+                if self.stopped:
+                    # Job yang masih antre dibatalkan sekarang, bukan setelah worker mengerjakannya
+                    worker_stop.set()
+                    for future in [f for f in in_flight if f.cancel()]:
+                        job_done(in_flight.pop(future))
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = in_flight.pop(future)
+                    job_done(job)
+                    alone = future is solo
+                    if alone:
+                        solo = None
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        if not alone:
+                            suspects.append(job)
+                            continue
+                        result = self._failed_job(job, f"worker process crashed while converting this file ({e})")
+                    except Exception as e:
+                        result = self._failed_job(job, str(e) or type(e).__name__)
+                    if result is not None:
+                        report(result)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _failed_job(self, job, error):
+        return ConversionResult(job[0], output_path_for(job[0], job[1], self.out_format), False, error, 0, 0, 0.0)
+
+    def _run_pipeline(self, next_job, job_done, waiting, report, stats):
+        pipeline = ConversionPipeline(self.out_format, self.resolution, self.quality_str, transformers=self.jobs,
+                                      target_kb=self.target_kb)
+        stats.pipeline = pipeline.stats
+        pipeline.start(self.stop_event)
+        in_flight = {}  # input_path -> [job, ...]
+        exhausted = False
+        try:
+            while True:
+                # Queue read terbatas: pengisian berhenti saat pipeline penuh (backpressure)
+                while not exhausted and not self.stopped and pipeline.has_room():
+                    job = next_job()
+                    if job is None:
+                        exhausted = not waiting()
+                        break
+                    pipeline.submit(job[0], output_path_for(job[0], job[1], self.out_format))
+                    in_flight.setdefault(job[0], []).append(job)
+                if not in_flight and (exhausted or self.stopped):
+                    break
+                try:
+                    input_path, result = pipeline.results.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                jobs = in_flight[input_path]
+                job_done(jobs.pop())
+                if not jobs:
+                    del in_flight[input_path]
+                if result is not None:
+                    report(result)
+        finally:
+            pipeline.close()
+
+
+def _emit(event, **fields):
+    print(json.dumps(dict(event=event, **fields)), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Macan Viewer headless batch image converter")
+    parser.add_argument("inputs", nargs="*", help="input files and/or folders")
+    parser.add_argument("-o", "--output", required=True, help="output folder (created if missing)")
+    parser.add_argument("-f", "--format", default="JPEG", type=str.upper, choices=OUTPUT_FORMATS)
+    parser.add_argument("-r", "--resolution", default="Original Size",
+                        help="target size WxH, e.g. 1280x720 (default: original size)")
+    parser.add_argument("-q", "--quality", default=str(DEFAULT_QUALITY),
+                        help="JPEG/WEBP quality 1-100 or a preset name like 'Good (85)'")
+    parser.add_argument("-R", "--recursive", action="store_true", help="descend into subfolders")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only convert matching files (repeatable; default: image extensions)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="skip matching files (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=default_jobs(), help="parallel worker processes")
+    parser.add_argument("--keep-going", action="store_true", help="do not stop at the first failed file")
+    parser.add_argument("--report", metavar="FILE",
+                        help="write failed files and their errors to FILE (.json for JSON, otherwise CSV)")
+    parser.add_argument("--retry", metavar="FILE",
+                        help="convert only the files listed in a previous --report (into their original folders)")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"skip files whose output is still valid (manifest: OUTPUT/{MANIFEST_NAME})")
+    parser.add_argument("--hash", action="store_true",
+                        help="with --incremental, compare content hashes when only the mtime changed")
+    parser.add_argument("--target-size", type=int, metavar="KB",
+                        help="JPEG/WEBP only: pick the highest quality whose output is at most KB kilobytes")
+    parser.add_argument("--max-memory", type=int, metavar="MB",
+                        help=f"memory ceiling for images being converted at once (default: "
+                             f"{MEMORY_BUDGET_FRACTION * 100:.0f}%% of available RAM, 0 = no limit)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="overlap reading, resizing and encoding in one process (reports per-stage busy time)")
+    args = parser.parse_args(argv)
+
+    if args.resolution.lower() in ("original", "original size"):
+        args.resolution = "Original Size"
+    try:
+        parse_resolution(args.resolution)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.target_size is not None and (args.target_size <= 0 or args.format.lower() not in QUALITY_FORMATS):
+        parser.error("--target-size needs a positive size and JPEG or WEBP output")
+    if args.retry:
+        try:
+            retry = read_failure_report(args.retry)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"cannot read failure report {args.retry}: {e}")
+        inputs = [(path, "") for path, _ in retry]
+        output_dirs = dict(retry)
+    elif args.inputs:
+        try:
+            inputs = collect_inputs(args.inputs, args.recursive, args.include, args.exclude)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        output_dirs = {path: os.path.join(args.output, rel_dir) for path, rel_dir in inputs}
+    else:
+        parser.error("no inputs given (pass files/folders or --retry FILE)")
+    engine = BatchConverter(args.output, args.format, args.resolution, args.quality,
+                            jobs=max(1, args.jobs), stop_on_error=not args.keep_going,
+                            incremental=args.incremental, use_hash=args.hash, pipeline=args.pipeline,
+                            memory_limit=None if args.max_memory is None else args.max_memory * 1024 * 1024,
+                            target_kb=args.target_size)
+    _emit("start", total=len(inputs), jobs=engine.jobs, format=args.format, resolution=args.resolution,
+          mode="pipeline" if args.pipeline else "processes")
+
+    def on_result(result, stats):
+        _emit("file", input=result.input_path, output=result.output_path, ok=result.ok,
+              skipped=result.skipped, error=result.error, quality=result.quality,
+              bytes_in=result.bytes_in, bytes_out=result.bytes_out, seconds=round(result.seconds, 3),
+              done=stats.done, total=stats.total,
+              files_per_second=round(stats.files_per_second, 2), mb_per_second=round(stats.mb_per_second, 2))
+
+    try:
+        stats = engine.run([path for path, _ in inputs], on_result, output_dirs)
+    except KeyboardInterrupt:
+        engine.stop()
+        _emit("interrupted")
+        return 130
+    if args.report and stats.failures:
+        try:
+            _emit("report", path=write_failure_report(args.report, stats.failures), failed=len(stats.failures))
+        except OSError as e:
+            _emit("report", path=args.report, error=str(e))
+    _emit("summary", stopped=engine.stopped, **stats.as_dict())
+    return 1 if stats.failed or stats.done < stats.total else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
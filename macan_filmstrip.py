@@ -0,0 +1,265 @@
+# macan_filmstrip.py
+# Filmstrip model/view: QListView hanya melukis baris yang terlihat, thumbnail dibuat saat diminta.
+# Thumbnail di-decode oleh ThumbnailService (macan_thumbnails) dan masuk ke model satu per satu.
+
+import os
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtGui import QColor, QPen, QPixmap
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, pyqtSignal
+
+FILMSTRIP_ITEM_SIZE = QSize(130, 100)
+FILMSTRIP_ICON_SIZE = QSize(120, 90)
+VIDEO_ICON_SIZE = QSize(64, 64)
+VIDEO_BADGE_SIZE = QSize(22, 22)
+FILMSTRIP_SPACING = 10
+# QPixmap thumbnail yang disimpan model; sisanya dibuat ulang dari cache decode saat terlihat lagi
+FILMSTRIP_PIXMAP_LIMIT = 512
+
+
+class FilmstripModel(QAbstractListModel):
+    """
+    Daftar path file untuk filmstrip. Model hanya menyimpan path; thumbnail
+    diminta ke `thumbnail_service` ketika view meminta DecorationRole (hanya
+    baris yang sedang dilukis) dan baris di-update saat QImage-nya datang.
+    """
+    def __init__(self, thumbnail_service, video_icon, video_extensions, parent=None):
+        super().__init__(parent)
+        self.thumbnail_service = thumbnail_service
+        self.thumbnail_service.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self.video_icon = video_icon
+        self.video_extensions = tuple(video_extensions)
+        self.files = []
+        self.rows = {}                # path -> row
+        self.pixmaps = OrderedDict()  # path -> QPixmap (LRU)
+        self.failed = set()           # path yang tidak bisa dibuat thumbnail-nya
+        self.current_row = -1
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.files):
+            return None
+        file_path = self.files[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._thumbnail(file_path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return os.path.basename(file_path)
+        if role == Qt.ItemDataRole.UserRole:
+            return file_path
+        return None
+
+    def set_files(self, files, current_row=-1):
+        self.thumbnail_service.cancel_all()
+        self.beginResetModel()
+        self.files = list(files)
+        self._reindex()
+        self.pixmaps.clear()
+        self.failed.clear()
+        self.current_row = current_row
+        self.endResetModel()
+
+    def apply_changes(self, files, removed_rows, inserted_rows):
+        """
+        Terapkan delta folder sekaligus. `removed_rows` adalah index di daftar lama,
+        `inserted_rows` index di daftar baru `files`. Baris berurutan digabung jadi satu
+        sinyal insert/remove, dan `rows` dibangun ulang sekali, bukan per file.
+        """
+        for first, last in reversed(_contiguous_runs(sorted(removed_rows))):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for file_path in self.files[first:last + 1]:
+                self.pixmaps.pop(file_path, None)
+                self.failed.discard(file_path)
+            del self.files[first:last + 1]
+            if first <= self.current_row <= last:
+                self.current_row = -1
+            elif self.current_row > last:
+                self.current_row -= last - first + 1
+            self.endRemoveRows()
+        # Sisipkan dari depan: posisi sebelum `first` sudah sama dengan daftar baru
+        for first, last in _contiguous_runs(sorted(inserted_rows)):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self.files[first:first] = files[first:last + 1]
+            if self.current_row >= first:
+                self.current_row += last - first + 1
+            self.endInsertRows()
+        self._reindex()
+
+    def refresh_file(self, file_path):
+        """File berubah di disk: buang thumbnail lama dan lukis ulang baris itu saja."""
+        self.pixmaps.pop(file_path, None)
+        self.failed.discard(file_path)
+        self._emit_row_changed(file_path)
+
+    def set_visible_range(self, first, last):
+        """
+        Prioritas decode: baris terlihat (kiri ke kanan), lalu tetangga di kedua
+        sisi sejauh satu layar. Antrean lain di luar rentang itu dibatalkan.
+        """
+        if not self.files or last < first:
+            self.thumbnail_service.cancel_all()
+            return
+        margin = last - first + 1
+        rows = list(range(first, last + 1))
+        for step in range(1, margin + 1):
+            rows.extend(row for row in (last + step, first - step) if 0 <= row < len(self.files))
+        wanted = []
+        for row in rows:
+            file_path = self.files[row]
+            if file_path not in self.pixmaps and file_path not in self.failed:
+                wanted.append(file_path)
+        self.thumbnail_service.prioritize(wanted)
+
+    def set_current_row(self, row):
+        """Highlight pindah: hanya baris lama dan baru yang dilukis ulang."""
+        previous, self.current_row = self.current_row, row
+        if previous == row:
+            return
+        for changed in (previous, row):
+            if 0 <= changed < len(self.files):
+                index = self.index(changed)
+                self.dataChanged.emit(index, index)
+
+    def is_video(self, file_path):
+        return os.path.splitext(file_path)[1].lower() in self.video_extensions
+
+    def _thumbnail(self, file_path):
+        pixmap = self.pixmaps.get(file_path)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(file_path)
+            return pixmap
+        if file_path not in self.failed:
+            self.thumbnail_service.request(file_path)
+        # Video tanpa frame (belum selesai / gagal di-probe) memakai ikon generik
+        return self.video_icon if self.is_video(file_path) else None
+
+    def _on_thumbnail_ready(self, file_path, image):
+        if file_path not in self.rows:
+            return
+        if image.isNull():
+            self.failed.add(file_path)
+            return
+        self.pixmaps[file_path] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > FILMSTRIP_PIXMAP_LIMIT:
+            self.pixmaps.popitem(last=False)
+        self._emit_row_changed(file_path)
+
+    def _emit_row_changed(self, file_path):
+        row = self.rows.get(file_path)
+        if row is None:
+            return
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def _reindex(self):
+        self.rows = {file_path: row for row, file_path in enumerate(self.files)}
+
+
+def _contiguous_runs(rows):
+    """Index terurut -> [(first, last), ...], satu pasangan per rentang berurutan."""
+    runs = []
+    for row in rows:
+        if runs and row == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
+
+class FilmstripDelegate(QStyledItemDelegate):
+    """Tile thumbnail 130x100 dengan warna yang sama seperti tombol filmstrip lama."""
+    def sizeHint(self, option, index):
+        return FILMSTRIP_ITEM_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        selected = index.row() == index.model().current_row
+        if selected:
+            painter.fillRect(rect, QColor("#5E81AC"))
+            painter.setPen(QPen(QColor("#88C0D0"), 1))
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        else:
+            painter.fillRect(rect, QColor("#3c3c3c"))
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            painter.fillRect(rect, QColor(255, 255, 255, 24))
+
+        model = index.model()
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is not None:
+            is_icon = pixmap.cacheKey() == model.video_icon.cacheKey()
+            box = VIDEO_ICON_SIZE if is_icon else FILMSTRIP_ICON_SIZE
+            size = pixmap.size().scaled(box, Qt.AspectRatioMode.KeepAspectRatio)
+            if pixmap.width() <= box.width() and pixmap.height() <= box.height():
+                size = pixmap.size()  # jangan perbesar thumbnail kecil
+            target = QRect(0, 0, size.width(), size.height())
+            target.moveCenter(rect.center())
+            painter.setRenderHint(painter.RenderHint.SmoothPixmapTransform)
+            painter.drawPixmap(target, pixmap)
+            # Frame video diberi badge kecil agar tetap bisa dibedakan dari foto
+            if not is_icon and model.is_video(index.data(Qt.ItemDataRole.UserRole)):
+                badge = QRect(target.left() + 4, target.bottom() - VIDEO_BADGE_SIZE.height() - 3,
+                              VIDEO_BADGE_SIZE.width(), VIDEO_BADGE_SIZE.height())
+                painter.drawPixmap(badge, model.video_icon)
+        painter.restore()
+
+
+class FilmstripView(QListView):
+    """QListView horizontal satu baris; item seragam sehingga layout O(1) per baris."""
+    # baris pertama dan terakhir yang terlihat (-1, -1 jika kosong)
+    visible_range_changed = pyqtSignal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.ViewMode.ListMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setUniformItemSizes(True)
+        self.setSpacing(FILMSTRIP_SPACING // 2)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.setItemDelegate(FilmstripDelegate(self))
+        self.horizontalScrollBar().valueChanged.connect(self._emit_visible_range)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self._emit_visible_range)
+        model.rowsInserted.connect(self._emit_visible_range)
+        model.rowsRemoved.connect(self._emit_visible_range)
+
+    def visible_range(self):
+        count = self.model().rowCount() if self.model() else 0
+        if count == 0 or not self.isVisible():
+            return -1, -1
+        # Semua item berukuran sama: baris dihitung langsung dari posisi scroll
+        pitch = FILMSTRIP_ITEM_SIZE.width() + 2 * self.spacing()
+        left = self.horizontalScrollBar().value()
+        first = min(count - 1, left // pitch)
+        last = min(count - 1, (left + self.viewport().width()) // pitch)
+        return first, last
+
+    def scroll_to_row(self, row):
+        """
+        Geser seminimal mungkin agar baris terlihat. Dengan item seragam posisi
+        baris dihitung langsung, tanpa layout ulang seluruh strip.
+        """
+        if self.model() is None or not 0 <= row < self.model().rowCount():
+            return
+        self.scrollTo(self.model().index(row), QAbstractItemView.ScrollHint.EnsureVisible)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._emit_visible_range()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._emit_visible_range()
+
+    def _emit_visible_range(self, *args):
+        self.visible_range_changed.emit(*self.visible_range())
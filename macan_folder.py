@@ -0,0 +1,61 @@
+# macan_folder.py
+# Scanner folder media: satu kali os.scandir, pencocokan ekstensi case-insensitive.
+
+import os
+from collections import namedtuple
+
+# mtime dalam nanodetik (st_mtime_ns), cocok untuk key cache
+MediaFileEntry = namedtuple("MediaFileEntry", ["path", "name", "size", "mtime"])
+
+
+def scan_media_folder(folder, extensions):
+    """
+    Daftar file media di folder (tidak rekursif), diurutkan berdasarkan nama.
+    Stat (size, mtime) ikut diambil dalam pass yang sama.
+    """
+    extensions = {ext.lower() for ext in extensions}
+    entries = []
+    try:
+        iterator = os.scandir(folder)
+    except OSError:
+        return entries
+
+    with iterator:
+        for entry in iterator:
+            # Sama seperti glob: file tersembunyi (diawali titik) tidak ikut
+            if entry.name.startswith('.'):
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in extensions:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append(MediaFileEntry(entry.path, entry.name, stat.st_size, stat.st_mtime_ns))
+
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+
+def diff_folder_entries(old_stats, entries):
+    """
+    Bandingkan hasil scan baru dengan stat lama {path: (size, mtime)}.
+    Return (added, removed, modified, renamed); renamed = {path_lama: path_baru}
+    untuk pasangan hapus+tambah dengan size dan mtime yang sama.
+    """
+    new_stats = {entry.path: (entry.size, entry.mtime) for entry in entries}
+    added = [path for path in new_stats if path not in old_stats]
+    removed = [path for path in old_stats if path not in new_stats]
+    modified = [path for path, stat in new_stats.items() if path in old_stats and old_stats[path] != stat]
+
+    renamed = {}
+    added_by_stat = {}
+    for path in added:
+        added_by_stat.setdefault(new_stats[path], []).append(path)
+    for path in removed:
+        candidates = added_by_stat.get(old_stats[path])
+        if candidates:
+            renamed[path] = candidates.pop(0)
+    return added, removed, modified, renamed
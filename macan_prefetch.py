@@ -0,0 +1,82 @@
+# macan_prefetch.py
+# Prefetch gambar tetangga di background agar navigasi next/previous instan.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImagePrefetcher:
+    """
+    Decode N gambar di depan dan di belakang index aktif pada worker thread.
+    Arah prefetch mengikuti arah navigasi terakhir user. `loader(path)`
+    bertugas decode dan menyimpan hasilnya ke cache yang dipakai viewer.
+    """
+    def __init__(self, loader, radius=2, max_workers=2, extensions=None):
+        self.loader = loader
+        self.radius = radius
+        self.extensions = tuple(extensions) if extensions else None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="macan-prefetch")
+        self.lock = threading.Lock()
+        self.futures = {}  # path -> Future
+        self.last_index = None
+        self.direction = 1
+
+    def update(self, files, index):
+        """Geser jendela prefetch ke index baru dan jadwalkan decode yang belum ada."""
+        if not files or index < 0:
+            self.clear()
+            return
+
+        if self.last_index is not None and index != self.last_index:
+            self.direction = 1 if index > self.last_index else -1
+        self.last_index = index
+
+        wanted = self._window(files, index)
+        with self.lock:
+            for path in list(self.futures):
+                if path not in wanted:
+                    self.futures.pop(path).cancel()
+            for path in wanted:
+                if path not in self.futures:
+                    self.futures[path] = self.executor.submit(self.loader, path)
+
+    def wait_for(self, path):
+        """
+        Tunggu decode path yang sedang berjalan agar tidak di-decode dua kali.
+        Jika masih antre (belum mulai), batalkan saja; caller decode sendiri.
+        """
+        with self.lock:
+            future = self.futures.pop(path, None)
+            if future is None or future.cancel():
+                return
+        try:
+            future.result()
+        except Exception:
+            pass
+
+    def clear(self):
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+            self.futures.clear()
+        self.last_index = None
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _window(self, files, index):
+        # Urutan prioritas: gambar di arah navigasi dulu, baru arah sebaliknya
+        ordered = []
+        for sign in (self.direction, -self.direction):
+            for step in range(1, self.radius + 1):
+                i = index + sign * step
+                if 0 <= i < len(files) and self._accepts(files[i]):
+                    ordered.append(files[i])
+        return ordered
+
+    def _accepts(self, path):
+        if self.extensions is None:
+            return True
+        return os.path.splitext(path)[1].lower() in self.extensions
@@ -0,0 +1,509 @@
+# macan_thumbnails.py
+# Service thumbnail filmstrip: worker pool sebesar jumlah core, antrean berprioritas
+# mengikuti item yang terlihat, hasil dikirim ke GUI thread sebagai QImage.
+# ThumbnailStore: cache thumbnail di disk sesuai freedesktop Thumbnail Managing Standard.
+# ThumbnailDecoder: thumbnail EXIF tertanam -> decode DCT-scaled -> decode penuh;
+# video: frame representatif lewat cv2.VideoCapture dengan batas waktu.
+
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from urllib.parse import quote, unquote
+
+import cv2
+import numpy as np
+from PIL import Image, ExifTags
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+
+from macan_cache import EXIF_ORIENTATION_TAG, REDUCED_DECODE_FLAGS, open_unbounded, pick_reduce_factor
+
+THUMBNAIL_STORE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "thumbnails")
+# Ukuran maksimum per flavor menurut spesifikasi
+THUMBNAIL_FLAVORS = {"normal": 128, "large": 256}
+THUMBNAIL_STORE_MAX_MB = 256
+THUMBNAIL_PRUNE_INTERVAL = 24 * 60 * 60
+THUMBNAIL_WARMUP_FOLDERS = 5
+THUMBNAIL_PRUNE_STAMP = os.path.join(os.path.expanduser("~"), ".cache", "macan_viewer", "thumbnail_prune")
+# Nilai "Software" di PNG; prune hanya menyentuh thumbnail yang ditulis aplikasi ini
+THUMBNAIL_SOFTWARE = "Macan Viewer"
+# Karakter yang dibiarkan apa adanya oleh g_filename_to_uri (GLib), agar hash sama dengan file manager
+_URI_SAFE_CHARS = "/!$&'()*+,;=:@"
+
+# Tag IFD1 untuk thumbnail JPEG tertanam (JPEGInterchangeFormat / ...Length)
+_EXIF_THUMBNAIL_OFFSET = 0x0201
+_EXIF_THUMBNAIL_LENGTH = 0x0202
+# Thumbnail tertanam ditolak jika rasio aspeknya beda (letterbox 160x120 pada foto 3:2)
+_EXIF_ASPECT_TOLERANCE = 0.03
+# ... atau jika jauh lebih kecil dari ukuran tile filmstrip
+_EXIF_MIN_COVERAGE = 0.75
+
+# Frame thumbnail video diambil di 10% durasi (melewati fade-in / layar hitam di awal)
+VIDEO_THUMBNAIL_POSITION = 0.10
+# Batas waktu satu probe video; file rusak tidak boleh menahan worker thumbnail
+VIDEO_PROBE_TIMEOUT = 5.0
+
+
+class ThumbnailService(QObject):
+    """
+    `loader(path) -> QImage | None` dijalankan di worker thread. Angka prioritas
+    kecil dikerjakan dulu; `prioritize()` mengganti seluruh antrean sehingga
+    item yang sudah jauh dari layar dibatalkan sebelum sempat di-decode.
+    """
+    # path, QImage (null jika gagal)
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, loader, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.condition = threading.Condition()
+        self.heap = []            # (prioritas, seq, path), entry basi dilewati saat di-pop
+        self.pending = {}         # path -> (prioritas, seq) yang berlaku
+        self.running = set()
+        self.counter = itertools.count()
+        self.stopped = False
+        self.workers = []
+        for i in range(max_workers or os.cpu_count() or 2):
+            worker = threading.Thread(target=self._run, name=f"macan-thumbs-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def request(self, path, priority=0):
+        """Antrekan path; jika sudah antre, prioritasnya hanya dinaikkan."""
+        with self.condition:
+            if path in self.running:
+                return
+            current = self.pending.get(path)
+            if current is not None and current[0] <= priority:
+                return
+            self._push(path, priority)
+            self.condition.notify()
+
+    def prioritize(self, paths):
+        """
+        Ganti antrean dengan `paths` (urutan = prioritas). Path antre lain
+        dibatalkan; yang sedang di-decode tetap diselesaikan.
+        """
+        with self.condition:
+            self.heap.clear()
+            self.pending.clear()
+            for priority, path in enumerate(paths):
+                if path not in self.running and path not in self.pending:
+                    self._push(path, priority)
+            self.condition.notify_all()
+
+    def cancel_all(self):
+        self.prioritize([])
+
+    def shutdown(self):
+        with self.condition:
+            self.stopped = True
+            self.heap.clear()
+            self.pending.clear()
+            self.condition.notify_all()
+
+    def _push(self, path, priority):
+        entry = (priority, next(self.counter))
+        self.pending[path] = entry
+        heapq.heappush(self.heap, entry + (path,))
+
+    def _next_job(self):
+        with self.condition:
+            while not self.stopped:
+                while self.heap:
+                    priority, seq, path = heapq.heappop(self.heap)
+                    if self.pending.get(path) == (priority, seq):
+                        del self.pending[path]
+                        self.running.add(path)
+                        return path
+                self.condition.wait()
+            return None
+
+    def _run(self):
+        while True:
+            path = self._next_job()
+            if path is None:
+                return
+            try:
+                image = self.loader(path)
+            except Exception as e:
+                print(f"Failed to create thumbnail for {path}: {e}")
+                image = None
+            finally:
+                with self.condition:
+                    self.running.discard(path)
+            if self.stopped:
+                return
+            self.thumbnail_ready.emit(path, image if image is not None else QImage())
+
+
+class ThumbnailStore:
+    """
+    Thumbnail PNG di ~/.cache/thumbnails/{normal,large}/<md5(uri)>.png yang
+    bisa dipakai bergantian dengan file manager (Nautilus, Dolphin, Thunar).
+    Entry hanya valid jika Thumb::URI dan Thumb::MTime cocok dengan file asli.
+    Semua method aman dipanggil dari worker thread (hanya QImage, tanpa QPixmap).
+    """
+    def __init__(self, root=THUMBNAIL_STORE_DIR, max_mb=THUMBNAIL_STORE_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.stop_event = threading.Event()
+        self.background = None
+
+    @staticmethod
+    def file_uri(path):
+        path = os.path.abspath(path).replace(os.sep, "/")
+        if not path.startswith("/"):
+            path = "/" + path  # drive Windows: file:///C:/...
+        return "file://" + quote(path, safe=_URI_SAFE_CHARS)
+
+    def thumbnail_path(self, path, flavor="normal"):
+        digest = hashlib.md5(self.file_uri(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, flavor, digest + ".png")
+
+    def load(self, path):
+        """QImage dari store (maks. 128 px) atau None jika belum ada / sudah basi."""
+        if self._is_inside_store(path):
+            return None
+        try:
+            mtime = str(int(os.stat(path).st_mtime))
+        except OSError:
+            return None
+        uri = self.file_uri(path)
+        for flavor in THUMBNAIL_FLAVORS:
+            thumb_path = self.thumbnail_path(path, flavor)
+            if not os.path.exists(thumb_path):
+                continue
+            # QImageReader.text() memotong key yang mengandung ':', jadi baca lewat QImage
+            image = QImage(thumb_path)
+            if image.isNull() or image.text("Thumb::URI") != uri or image.text("Thumb::MTime") != mtime:
+                continue
+            limit = THUMBNAIL_FLAVORS["normal"]
+            if image.width() > limit or image.height() > limit:
+                image = image.scaled(limit, limit, Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+            return image
+        return None
+
+    def save(self, path, image):
+        """Simpan thumbnail sebagai flavor 'normal'. Ditulis ke file sementara lalu di-rename."""
+        if image is None or image.isNull() or self._is_inside_store(path):
+            return
+        try:
+            stat = os.stat(path)
+            target = self.thumbnail_path(path, "normal")
+            os.makedirs(os.path.dirname(target), mode=0o700, exist_ok=True)
+        except OSError:
+            return
+        limit = THUMBNAIL_FLAVORS["normal"]
+        if image.width() > limit or image.height() > limit:
+            image = image.scaled(limit, limit, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        else:
+            image = image.copy()
+        image.setText("Thumb::URI", self.file_uri(path))
+        image.setText("Thumb::MTime", str(int(stat.st_mtime)))
+        image.setText("Thumb::Size", str(stat.st_size))
+        image.setText("Software", THUMBNAIL_SOFTWARE)
+
+        temp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not image.save(temp, "PNG"):
+                raise OSError("PNG encoder failed")
+            os.chmod(temp, 0o600)
+            os.replace(temp, target)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def start_maintenance(self, warmup_folders=(), generate=None, extensions=None, stamp_path=THUMBNAIL_PRUNE_STAMP):
+        """
+        Satu thread background berprioritas rendah: isi store untuk folder yang
+        baru dikunjungi (`generate(path)` membuat dan menyimpan thumbnail), lalu
+        prune paling banyak sekali per THUMBNAIL_PRUNE_INTERVAL.
+        """
+        if self.background is not None:
+            return
+        self.background = threading.Thread(
+            target=self._maintenance, args=(list(warmup_folders), generate, extensions, stamp_path),
+            name="macan-thumbs-maintenance", daemon=True)
+        self.background.start()
+
+    def shutdown(self):
+        self.stop_event.set()
+
+    def prune(self):
+        """
+        Hapus thumbnail basi (mtime file asli berubah), lalu thumbnail tertua sampai
+        total ukuran milik Macan Viewer di bawah max_bytes. Thumbnail aplikasi lain
+        (Software berbeda) tidak pernah disentuh. Return jumlah yang dihapus.
+        """
+        removed = 0
+        survivors = []
+        for flavor in THUMBNAIL_FLAVORS:
+            folder = os.path.join(self.root, flavor)
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if self.stop_event.is_set():
+                    return removed
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                owned, stale = self._inspect(entry.path)
+                if not owned:
+                    continue
+                if stale:
+                    removed += self._remove(entry.path)
+                else:
+                    survivors.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in survivors)
+        for _, size, thumb_path in sorted(survivors):
+            if total <= self.max_bytes or self.stop_event.is_set():
+                break
+            removed += self._remove(thumb_path)
+            total -= size
+        return removed
+
+    def _maintenance(self, warmup_folders, generate, extensions, stamp_path):
+        if generate is not None:
+            wanted = {ext.lower() for ext in extensions} if extensions else None
+            for folder in warmup_folders:
+                try:
+                    names = sorted(os.listdir(folder))
+                except OSError:
+                    continue
+                for name in names:
+                    if self.stop_event.is_set():
+                        return
+                    if wanted is not None and os.path.splitext(name)[1].lower() not in wanted:
+                        continue
+                    path = os.path.join(folder, name)
+                    if self.load(path) is not None:
+                        continue
+                    try:
+                        generate(path)
+                    except Exception as e:
+                        print(f"Thumbnail warm-up failed for {path}: {e}")
+
+        if stamp_path:
+            try:
+                if time.time() - os.path.getmtime(stamp_path) < THUMBNAIL_PRUNE_INTERVAL:
+                    return
+            except OSError:
+                pass
+        self.prune()
+        if stamp_path:
+            try:
+                os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+                with open(stamp_path, "w") as stamp:
+                    stamp.write(str(int(time.time())))
+            except OSError:
+                pass
+
+    def _inspect(self, thumb_path):
+        # Return (milik Macan Viewer, basi). PIL hanya membaca chunk sebelum IDAT,
+        # piksel tidak di-decode.
+        try:
+            with Image.open(thumb_path) as thumb:
+                text = dict(thumb.info)
+        except Exception:
+            return False, False  # PNG rusak: pemiliknya tidak diketahui, biarkan
+        if text.get("Software") != THUMBNAIL_SOFTWARE:
+            return False, False
+        uri = text.get("Thumb::URI", "")
+        if not uri.startswith("file://"):
+            return True, False
+        path = unquote(uri[len("file://"):])
+        if os.name == "nt":
+            path = path.lstrip("/")
+        try:
+            return True, str(int(os.stat(path).st_mtime)) != text.get("Thumb::MTime")
+        except OSError:
+            # Drive belum di-mount / share offline: bukan berarti file asli sudah dihapus
+            return True, False
+
+    def _is_inside_store(self, path):
+        # Spesifikasi: jangan membuat thumbnail dari thumbnail
+        return os.path.abspath(path).startswith(os.path.abspath(self.root) + os.sep)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+
+def _apply_exif_orientation(image, orientation):
+    """Putar/flip array BGR sesuai tag Orientation EXIF (1..8)."""
+    if orientation in (2, 4, 5, 7):
+        image = cv2.flip(image, 1 if orientation in (2, 5) else 0)
+    if orientation in (3, 4):
+        image = cv2.rotate(image, cv2.ROTATE_180)
+    elif orientation in (5, 6):
+        image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    elif orientation in (7, 8):
+        image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return image
+
+
+class ThumbnailDecoder:
+    """
+    Buat thumbnail BGR (numpy) dengan strategi termurah yang berhasil:
+      exif    - thumbnail JPEG yang tertanam di EXIF (tanpa decode gambar utama)
+      reduced - decode 1/2, 1/4 atau 1/8 (DCT scaling libjpeg) lewat IMREAD_REDUCED_*
+      full    - decode penuh, hanya jika dua strategi di atas gagal
+    Strategi lain (mis. QImageReader untuk GIF) bisa ikut dicatat lewat `timed()`.
+    Video memakai `decode_video()` (strategi 'video').
+    """
+    STRATEGIES = ("exif", "reduced", "full")
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.counters = {}  # strategi -> [berhasil, gagal, total detik]
+
+    def decode(self, path):
+        header = self._read_header(path)
+        for strategy in self.STRATEGIES:
+            image = self.timed(strategy, getattr(self, "_decode_" + strategy), path, header)
+            if image is not None:
+                return self._fit(image)
+        return None
+
+    def decode_video(self, path):
+        frame = self.timed("video", self._probe_video, path)
+        return self._fit(frame) if frame is not None else None
+
+    def timed(self, strategy, func, *args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            counter = self.counters.setdefault(strategy, [0, 0, 0.0])
+            counter[0 if result is not None else 1] += 1
+            counter[2] += elapsed
+        return result
+
+    def stats(self):
+        """{strategi: {"hits", "misses", "total_ms", "avg_ms"}} untuk strategi yang pernah dicoba."""
+        with self.lock:
+            return {
+                strategy: {
+                    "hits": hits,
+                    "misses": misses,
+                    "total_ms": seconds * 1000,
+                    "avg_ms": seconds * 1000 / (hits + misses) if hits + misses else 0.0,
+                }
+                for strategy, (hits, misses, seconds) in self.counters.items()
+            }
+
+    def _read_header(self, path):
+        # Ukuran mentah (sebelum orientasi), orientasi, dan byte thumbnail EXIF; tanpa decode piksel
+        try:
+            with open_unbounded(path) as img:
+                exif = img.getexif()
+                thumbnail = None
+                raw = img.info.get("exif")
+                ifd1 = exif.get_ifd(ExifTags.IFD.IFD1) if raw else {}
+                offset, length = ifd1.get(_EXIF_THUMBNAIL_OFFSET), ifd1.get(_EXIF_THUMBNAIL_LENGTH)
+                if offset and length:
+                    # Offset IFD1 relatif terhadap header TIFF, setelah prefix "Exif\0\0"
+                    tiff = raw[6:] if raw.startswith(b"Exif\x00\x00") else raw
+                    thumbnail = tiff[offset:offset + length] or None
+                return img.size, exif.get(EXIF_ORIENTATION_TAG, 1), thumbnail
+        except Exception:
+            return None, 1, None
+
+    def _decode_exif(self, path, header):
+        size, orientation, data = header
+        if data is None or size is None:
+            return None
+        thumb = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if thumb is None:
+            return None
+        (w, h), (th, tw) = size, thumb.shape[:2]
+        if abs(tw / th - w / h) > _EXIF_ASPECT_TOLERANCE * (w / h):
+            return None
+        fit = min(self.size[0] / w, self.size[1] / h, 1.0)
+        if tw < w * fit * _EXIF_MIN_COVERAGE:
+            return None
+        return _apply_exif_orientation(thumb, orientation)
+
+    def _decode_reduced(self, path, header):
+        size, orientation, _ = header
+        if size is not None and orientation in (5, 6, 7, 8):
+            size = size[::-1]
+        factor = pick_reduce_factor(size, self.size)
+        if factor == 1:
+            return None
+        # cv2 menerapkan orientasi EXIF sendiri
+        return cv2.imread(path, REDUCED_DECODE_FLAGS[factor])
+
+    def _decode_full(self, path, header):
+        return cv2.imread(path)
+
+    def _probe_video(self, path):
+        # Thread terpisah agar bisa ditinggal jika demuxer/decoder macet;
+        # thread yang tertinggal adalah daemon dan selesai sendiri (atau bersama proses).
+        result = []
+
+        def grab():
+            try:
+                result.append(self._grab_video_frame(path))
+            except Exception as e:
+                print(f"Failed to probe video {path}: {e}")
+
+        probe = threading.Thread(target=grab, name="macan-video-probe", daemon=True)
+        probe.start()
+        probe.join(VIDEO_PROBE_TIMEOUT)
+        if probe.is_alive():
+            print(f"Video probe timed out after {VIDEO_PROBE_TIMEOUT:.0f}s: {path}")
+            return None
+        return result[0] if result else None
+
+    @staticmethod
+    def _grab_video_frame(path):
+        timeout_ms = int(VIDEO_PROBE_TIMEOUT * 1000)
+        capture = cv2.VideoCapture(path, cv2.CAP_ANY, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms,
+        ])
+        try:
+            if not capture.isOpened():
+                return None
+            frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+            if frame_count > 1:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, int(frame_count * VIDEO_THUMBNAIL_POSITION))
+            ok, frame = capture.read()
+            if not ok and frame_count > 1:
+                # Seek gagal (index rusak / stream tanpa keyframe): pakai frame pertama
+                capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = capture.read()
+            return frame if ok else None
+        finally:
+            capture.release()
+
+    def _fit(self, image):
+        h, w = image.shape[:2]
+        scale = min(self.size[0] / w, self.size[1] / h, 1.0)
+        if scale >= 1.0:
+            return image
+        return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
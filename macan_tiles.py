@@ -0,0 +1,325 @@
+# macan_tiles.py
+# Backend gambar ter-tile (pyramid mipmap) untuk scan, panorama dan peta berukuran giga-piksel.
+
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from macan_cache import EXIF_ORIENTATION_TAG, open_unbounded
+
+# pyvips opsional: jika terpasang, region di-decode langsung dari file tanpa pyramid di disk
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+
+TILE_SIZE = 512
+TILED_IMAGE_MIN_PIXELS = 100_000_000
+OVERVIEW_MAX_SIDE = 2048
+TILE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "macan_viewer", "tiles")
+TILE_CACHE_MAX_MB = 2048
+DECODE_CHUNK_BYTES = 1 << 20
+
+
+def needs_tiling(image_size):
+    return bool(image_size) and image_size[0] * image_size[1] >= TILED_IMAGE_MIN_PIXELS
+
+
+def _folder_size(path):
+    size = 0
+    for folder, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                pass
+    return size
+
+
+def prune_tile_cache(cache_dir=TILE_CACHE_DIR, max_mb=TILE_CACHE_MAX_MB, keep=()):
+    """
+    Hapus pyramid yang paling lama tidak dibuka sampai total cache di bawah max_mb.
+    Folder di `keep` (pyramid yang sedang dipakai) tidak disentuh. Return jumlah yang dihapus.
+    """
+    keep = {os.path.normcase(os.path.abspath(path)) for path in keep}
+    pyramids = []
+    try:
+        entries = list(os.scandir(cache_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        if os.path.normcase(os.path.abspath(entry.path)) in keep:
+            continue
+        try:
+            pyramids.append((entry.stat().st_mtime, _folder_size(entry.path), entry.path))
+        except OSError:
+            continue
+
+    total = sum(size for _, size, _ in pyramids)
+    total += sum(_folder_size(path) for path in keep)
+    removed = 0
+    for _, size, path in sorted(pyramids):
+        if total <= max_mb * 1024 * 1024:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+class TiledImage:
+    """
+    Gambar besar sebagai pyramid tile TILE_SIZE x TILE_SIZE. Level 0 = resolusi
+    penuh, tiap level berikutnya setengahnya. Tile hanya di-decode saat
+    diminta viewport dan disimpan di DecodedImageCache (LRU).
+    """
+    def __init__(self, path, image_size, cache, cache_dir=TILE_CACHE_DIR, on_tile_ready=None):
+        self.path = path
+        self.width, self.height = image_size
+        self.cache = cache
+        self.on_tile_ready = on_tile_ready
+
+        self.level_sizes = [(self.width, self.height)]
+        w, h = self.width, self.height
+        while w > TILE_SIZE or h > TILE_SIZE:
+            w, h = (w + 1) // 2, (h + 1) // 2
+            self.level_sizes.append((w, h))
+        self.overview_level = next(
+            (i for i, (lw, lh) in enumerate(self.level_sizes) if max(lw, lh) <= OVERVIEW_MAX_SIDE),
+            len(self.level_sizes) - 1)
+
+        stat = os.stat(path)
+        self.key_base = (path, stat.st_mtime_ns, stat.st_size)
+        digest = hashlib.sha1(repr(self.key_base).encode("utf-8")).hexdigest()
+        self.cache_dir = cache_dir
+        self.pyramid_dir = os.path.join(cache_dir, digest)
+
+        self.vips_levels = {}
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.stop_event = threading.Event()   # membatalkan pembangunan pyramid yang sedang jalan
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="macan-tiles")
+
+    @property
+    def overview_factor(self):
+        return 2 ** self.overview_level
+
+    def prepare(self):
+        """
+        Siapkan backend. Blocking (bisa beberapa detik saat pyramid pertama kali dibangun).
+        Return False jika dibatalkan lewat shutdown() sebelum selesai.
+        """
+        if self.stop_event.is_set():
+            return False
+        if pyvips is not None:
+            self.vips_levels[0] = pyvips.Image.new_from_file(self.path, access="random")
+        elif os.path.exists(os.path.join(self.pyramid_dir, "overview.png")):
+            try:
+                os.utime(self.pyramid_dir)  # tandai baru dipakai untuk prune_tile_cache
+            except OSError:
+                pass
+        elif not self._build_pyramid():
+            return False
+        return True
+
+    def overview(self):
+        """Seluruh gambar pada level overview (sisi terpanjang <= OVERVIEW_MAX_SIDE), BGR."""
+        if pyvips is not None:
+            return self._vips_region(self.overview_level, 0, 0, *self.level_sizes[self.overview_level])
+        return cv2.imread(os.path.join(self.pyramid_dir, "overview.png"))
+
+    def level_for_scale(self, scale):
+        """Level dengan resolusi terkecil yang masih >= skala tampilan (px layar / px asli)."""
+        level = 0
+        while level + 1 < len(self.level_sizes) and scale * 2 ** (level + 1) <= 1.0:
+            level += 1
+        return level
+
+    def tile_grid(self, level):
+        lw, lh = self.level_sizes[level]
+        return (lw + TILE_SIZE - 1) // TILE_SIZE, (lh + TILE_SIZE - 1) // TILE_SIZE
+
+    def cached_tile(self, level, col, row):
+        return self.cache.get(self._tile_key(level, col, row), count_stats=False)
+
+    def request_tile(self, level, col, row):
+        """Jadwalkan decode tile di background; on_tile_ready dipanggil dari worker thread."""
+        key = self._tile_key(level, col, row)
+        with self.lock:
+            if key in self.pending or self.cache.contains(key):
+                return
+            self.pending.add(key)
+        self.executor.submit(self._load_tile, key, level, col, row)
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _tile_key(self, level, col, row):
+        return self.key_base + (("tile", level, col, row),)
+
+    def _load_tile(self, key, level, col, row):
+        try:
+            tile = self._decode_tile(level, col, row)
+            self.cache.put(key, tile)
+        except Exception as e:
+            print(f"Failed to decode tile {level}/{col}_{row} of {self.path}: {e}")
+            tile = None
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+        if tile is not None and self.on_tile_ready:
+            self.on_tile_ready(level, col, row)
+
+    def _decode_tile(self, level, col, row):
+        lw, lh = self.level_sizes[level]
+        x, y = col * TILE_SIZE, row * TILE_SIZE
+        w, h = min(TILE_SIZE, lw - x), min(TILE_SIZE, lh - y)
+        if pyvips is not None:
+            return self._vips_region(level, x, y, w, h)
+        return cv2.imread(os.path.join(self.pyramid_dir, str(level), f"{col}_{row}.jpg"))
+
+    def _vips_region(self, level, x, y, w, h):
+        with self.lock:
+            image = self.vips_levels.get(level)
+            if image is None:
+                image = self.vips_levels[0].resize(1 / 2 ** level)
+                self.vips_levels[level] = image
+        region = image.crop(x, y, min(w, image.width - x), min(h, image.height - y))
+        if region.bands == 4:
+            region = region.flatten()
+        elif region.bands == 1:
+            region = region.colourspace("srgb")
+        array = np.ndarray(buffer=region.write_to_memory(), dtype=np.uint8,
+                           shape=(region.height, region.width, region.bands))
+        return cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+
+    def _build_pyramid(self):
+        # Tanpa pyvips: tulis semua level sebagai tile JPEG. Pembukaan berikutnya
+        # hanya membaca tile yang terlihat.
+        partial_dir = self.pyramid_dir + ".partial"
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        try:
+            finished = self._write_pyramid(partial_dir)
+        except BaseException:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            raise
+        if not finished:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            return False
+        shutil.rmtree(self.pyramid_dir, ignore_errors=True)
+        os.replace(partial_dir, self.pyramid_dir)
+        prune_tile_cache(self.cache_dir, keep=(self.pyramid_dir,))
+        return True
+
+    def _write_pyramid(self, partial_dir):
+        # Piksel tiap level tinggal di file scratch ter-mmap (di disk, bukan RAM).
+        # Level diproses per strip setinggi TILE_SIZE; tiap strip langsung di-reduce
+        # ke level berikutnya, jadi yang ada di RAM hanya satu strip.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with contextlib.ExitStack() as scratch_files:
+            pixels = self._decode_level0(scratch_files)
+            for level in range(len(self.level_sizes)):
+                if pixels is None or self.stop_event.is_set():
+                    return False
+                next_pixels = None
+                if level + 1 < len(self.level_sizes):
+                    nw, nh = self.level_sizes[level + 1]
+                    next_pixels = self._scratch_array(scratch_files, (nh, nw, 3))
+                if not self._write_level(level, pixels, partial_dir, next_pixels):
+                    return False
+                pixels = next_pixels
+        return True
+
+    def _scratch_array(self, scratch_files, shape):
+        scratch = scratch_files.enter_context(tempfile.TemporaryFile(dir=self.cache_dir))
+        return np.memmap(scratch, dtype=np.uint8, mode="w+", shape=shape)
+
+    def _decode_level0(self, scratch_files):
+        """
+        Piksel resolusi penuh (RGB/RGBX/L). JPEG di-decode langsung ke memmap scratch;
+        format lain hanya bisa di-decode utuh oleh PIL (gunakan pyvips untuk itu).
+        Return None jika dibatalkan.
+        """
+        with open_unbounded(self.path) as source:
+            if source.format == "JPEG" and source.mode in ("RGB", "L") and len(source.tile) == 1 \
+                    and source.getexif().get(EXIF_ORIENTATION_TAG, 1) == 1:
+                return self._decode_jpeg_mapped(source, scratch_files)
+            image = ImageOps.exif_transpose(source).convert("RGB")
+        return np.asarray(image)
+
+    def _decode_jpeg_mapped(self, source, scratch_files):
+        # Mode RGB di PIL tersimpan 4 byte/piksel (layout RGBX), sehingga decoder
+        # bisa menulis langsung ke buffer eksternal yang di-map sebagai RGBX/L.
+        channels = 4 if source.mode == "RGB" else 1
+        pixels = self._scratch_array(scratch_files, (self.height, self.width, channels))
+        mode = "RGBX" if channels == 4 else "L"
+        target = Image.frombuffer(mode, source.size, pixels, "raw", mode, 0, 1)
+        name, extents, offset, args = source.tile[0]
+        decoder = Image._getdecoder(source.mode, name, args, source.decoderconfig)
+        try:
+            decoder.setimage(target.im, extents)
+            source.fp.seek(offset)
+            data = b""
+            while True:
+                if self.stop_event.is_set():
+                    return None
+                chunk = source.fp.read(DECODE_CHUNK_BYTES)
+                if not chunk:
+                    raise OSError("image file is truncated")
+                data += chunk
+                consumed, error = decoder.decode(data)
+                if consumed < 0:
+                    break
+                data = data[consumed:]
+        finally:
+            decoder.cleanup()
+        if error < 0:
+            raise OSError(f"JPEG decoder error {error}")
+        return pixels
+
+    def _write_level(self, level, pixels, partial_dir, next_pixels):
+        lw, lh = self.level_sizes[level]
+        level_dir = os.path.join(partial_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        cols, rows = self.tile_grid(level)
+        for row in range(rows):
+            if self.stop_event.is_set():
+                return False
+            top, bottom = row * TILE_SIZE, min((row + 1) * TILE_SIZE, lh)
+            strip = np.asarray(pixels[top:bottom])
+            if level == 0:
+                strip = _rgb_to_bgr(strip)
+            for col in range(cols):
+                tile_path = os.path.join(level_dir, f"{col}_{row}.jpg")
+                if not cv2.imwrite(tile_path, strip[:, col * TILE_SIZE:(col + 1) * TILE_SIZE],
+                                   [cv2.IMWRITE_JPEG_QUALITY, 92]):
+                    raise OSError(f"Cannot write tile {tile_path}")
+            if next_pixels is not None:
+                next_top, next_bottom = top // 2, (bottom + 1) // 2
+                next_pixels[next_top:next_bottom] = cv2.resize(
+                    strip, (next_pixels.shape[1], next_bottom - next_top), interpolation=cv2.INTER_AREA)
+        if level == self.overview_level:
+            overview = np.asarray(pixels)
+            if level == 0:
+                overview = _rgb_to_bgr(overview)
+            cv2.imwrite(os.path.join(partial_dir, "overview.png"), overview)
+        return True
+
+
+def _rgb_to_bgr(pixels):
+    if pixels.ndim == 2 or pixels.shape[2] == 1:
+        return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGR)
+    if pixels.shape[2] == 4:
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
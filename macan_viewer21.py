@@ -7,9 +7,11 @@ import platform
 import subprocess
 import re
 import requests
-from glob import glob
 import webbrowser
+import multiprocessing
+import time
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 # --- PENAMBAHAN: Library baru untuk Multimedia (Video) dan QStackedWidget ---
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
@@ -28,12 +30,12 @@ from PyQt6.QtWidgets import (
     QStackedWidget,
     # --- PENAMBAHAN: Widget untuk dialog preset ---
     QListWidget,
-    QStyle
+    QStyle, QSpinBox
 )
-from PyQt6.QtGui import QPixmap, QImage, QAction, QIcon, QKeySequence, QPainter, QCursor
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QAction, QIcon, QKeySequence, QPainter, QCursor
 from PyQt6.QtCore import (
-    Qt, QSize, QPoint, QRect, QByteArray, QThread, QObject, pyqtSignal, QTimer,
-    QSettings,
+    Qt, QSize, QPoint, QRect, QRectF, QByteArray, QThread, QObject, pyqtSignal, QTimer,
+    QSettings, QFileSystemWatcher,
     # --- PENAMBAHAN: Library URL untuk path file media ---
     QUrl
 )
@@ -43,6 +45,22 @@ from macan_efek import ImageEffects, CollageDialog, AdjustmentsDialog
 from macan_search import ImageSearchApp
 # --- PENAMBAHAN: Import modul preset ---
 from macan_preset import PresetManager, apply_preset
+# --- PENAMBAHAN: Prefetch gambar tetangga di background ---
+from macan_prefetch import ImagePrefetcher
+# --- PENAMBAHAN: Cache gambar hasil decode (LRU, dibatasi MB) ---
+from macan_cache import DecodedImageCache, ImageHeaderCache, pick_reduce_factor, imread_reduced
+# --- PENAMBAHAN: Backend tile untuk gambar giga-piksel ---
+from macan_tiles import TiledImage, TILE_SIZE, needs_tiling
+# --- PENAMBAHAN: Scan folder satu pass dengan os.scandir ---
+from macan_folder import scan_media_folder, diff_folder_entries
+# --- PENAMBAHAN: Filmstrip model/view (hanya item terlihat yang dilukis) ---
+from macan_filmstrip import FilmstripModel, FilmstripView, VIDEO_ICON_SIZE
+# --- PENAMBAHAN: Thumbnail di-decode di worker pool, item terlihat didahulukan ---
+from macan_thumbnails import ThumbnailService, ThumbnailStore, ThumbnailDecoder, THUMBNAIL_WARMUP_FOLDERS
+# --- PENAMBAHAN: Mesin konversi tanpa Qt (process pool untuk batch) ---
+from macan_convert import (BatchConverter, convert_image, output_path_for, parse_resolution, default_jobs,
+                           write_failure_report, convert_image_to_target, encode_to_target_size,
+                           target_size_error, QUALITY_FORMATS)
 
 
 # --- Konstanta untuk format file ---
@@ -50,6 +68,28 @@ SUPPORTED_IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.webp', '.gif']
 SUPPORTED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mkv', '.mov', '.wmv']
 ALL_SUPPORTED_EXTENSIONS = SUPPORTED_IMAGE_EXTENSIONS + SUPPORTED_VIDEO_EXTENSIONS
 
+# --- Konstanta untuk cache dan thumbnail filmstrip ---
+DEFAULT_CACHE_BUDGET_MB = 512
+THUMBNAIL_SIZE = (130, 100)
+
+
+def _numpy_to_qimage(image):
+    """QImage yang membaca buffer BGR/BGRA OpenCV langsung, tanpa cvtColor."""
+    if not image.flags['C_CONTIGUOUS']:
+        image = image.copy()
+    h, w = image.shape[:2]
+    if image.ndim == 2:
+        fmt = QImage.Format.Format_Grayscale8
+    elif image.shape[2] == 4:
+        # Urutan byte BGRA di memori little-endian = ARGB32
+        fmt = QImage.Format.Format_ARGB32
+    else:
+        fmt = QImage.Format.Format_BGR888
+    qt_image = QImage(image.data, w, h, image.strides[0], fmt)
+    # QImage hanya mereferensikan buffer numpy; simpan referensinya agar tidak dibebaskan
+    qt_image.ndarray = image
+    return qt_image
+
 # --- KELAS DIALOG BARU UNTUK MANAJEMEN PRESET ---
 class ManagePresetsDialog(QDialog):
     def __init__(self, preset_manager, parent=None):
@@ -173,7 +213,7 @@ class ManagePresetsDialog(QDialog):
             QMessageBox.information(self, "Import Complete", "\n".join(message_parts))
 
 
-# Teks untuk Image Converter Widget (Tidak ada perubahan)
+# Teks untuk Image Converter Widget
 CONVERTER_TEXT = {
     "window_title": "Image Converter",
     "input_img_label": "1. Select Input Image File(s):",
@@ -207,62 +247,70 @@ CONVERTER_TEXT = {
     "error_in_batch": "Error on file {index}: {error}\n\nBatch process stopped.",
     "error_title": "Error",
     "done": "Done!",
+    "jobs_label": "Parallel Jobs:",
+    "batch_throughput": "{files_per_sec:.1f} files/s, {mb_per_sec:.1f} MB/s",
+    "stopping_batch": "Stopping after the files in progress...",
+    "incremental_checkbox": "Skip files already converted with these settings",
+    "batch_skipped": "{count} file(s) were already up to date and skipped.",
+    "pipeline_checkbox": "Pipelined mode (overlap disk reads, resizing and encoding)",
+    "pipeline_bottleneck": "Slowest stage: {stage} ({utilization:.0%} busy)",
+    "continue_on_error_checkbox": "Continue on errors (report failed files at the end)",
+    "batch_complete_with_failures": "Batch finished: {ok} of {total} files converted, {failed} failed.",
+    "failure_report_saved": "Failure report: {path}",
+    "failure_report_error": "Could not write the failure report: {error}",
+    "retry_failed_title": "Some Files Failed",
+    "retry_failed_msg": "{failed} file(s) could not be converted.\n\nRetry only the failed files?",
+    "target_size_label": "Target Size:",
+    "target_size_off": "Off (use quality)",
+    "target_size_success": "Success! Saved {size_kb:.0f} KB at quality {quality} in {seconds:.2f} s ({trials} trial encodes).",
+    "target_size_file": "{filename}: {size_kb:.0f} KB at quality {quality}, {seconds:.2f} s",
 }
 
-# Kelas Worker untuk Konversi Gambar (Tidak ada perubahan)
+# Kelas Worker untuk Konversi Gambar
 class ImageConversionWorker(QObject):
     progress_updated = pyqtSignal(int, str)
     conversion_finished = pyqtSignal(str)
     conversion_error = pyqtSignal(str)
 
-    def __init__(self, input_path, output_path, out_format, resolution, quality_str, lang_dict=None):
+    def __init__(self, input_path, output_path, out_format, resolution, quality_str, lang_dict=None, target_kb=None):
         super().__init__()
         self.input_path = input_path
         self.output_path = output_path
         self.out_format = out_format
         self.resolution = resolution
         self.quality_str = quality_str
+        self.target_kb = target_kb
         self.is_running = True
         self.lang = lang_dict if lang_dict else CONVERTER_TEXT
 
     def stop(self):
         self.is_running = False
         
+    # --- MODIFIKASI: Logika konversi dipindah ke macan_convert.convert_image (dipakai juga oleh batch/CLI) ---
     def run(self):
         try:
             self.progress_updated.emit(0, self.lang["opening_image"].format(filename=os.path.basename(self.input_path)))
             if not self.is_running: return
-            
-            img = Image.open(self.input_path)
-
-            if self.resolution != "Original Size":
-                try:
-                    res_parts = self.resolution.split(' ')[0].split('x')
-                    new_size = (int(res_parts[0]), int(res_parts[1]))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                except (ValueError, IndexError):
-                    self.conversion_error.emit(f"Invalid resolution format: {self.resolution}")
-                    return
-
-            self.progress_updated.emit(50, self.lang["processing_image"])
-            if not self.is_running: return
 
-            base_name = os.path.splitext(os.path.basename(self.input_path))[0]
-            output_filename = os.path.join(self.output_path, f"{base_name}.{self.out_format.lower()}")
-            
-            save_options = {}
-            if self.out_format.lower() in ['jpeg', 'jpg', 'webp']:
-                quality_map = {
-                    "Maximum (100)": 100, "Very Good (95)": 95, "Good (85)": 85,
-                    "Medium (75)": 75, "Low (50)": 50
-                }
-                save_options['quality'] = quality_map.get(self.quality_str, 85)
-            
-            if self.out_format.lower() in ['jpeg', 'jpg']:
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
+            try:
+                parse_resolution(self.resolution)
+            except ValueError as e:
+                self.conversion_error.emit(str(e))
+                return
 
-            img.save(output_filename, **save_options)
+            output_filename = output_path_for(self.input_path, self.output_path, self.out_format)
+            # --- PENAMBAHAN: Mode target ukuran file; kualitas dicari di memori ---
+            if self.target_kb:
+                result = convert_image_to_target(
+                    self.input_path, output_filename, self.out_format, self.resolution, self.target_kb,
+                    progress=lambda value, stage: self.progress_updated.emit(value, self.lang[stage]))
+                self.progress_updated.emit(100, self.lang["saving_image"])
+                self.conversion_finished.emit(self.lang["target_size_success"].format(
+                    size_kb=len(result.data) / 1024, quality=result.quality, seconds=result.seconds,
+                    trials=result.trials))
+                return
+            convert_image(self.input_path, output_filename, self.out_format, self.resolution, self.quality_str,
+                          progress=lambda value, stage: self.progress_updated.emit(value, self.lang[stage]))
             self.progress_updated.emit(100, self.lang["saving_image"])
             self.conversion_finished.emit(self.lang["image_conversion_success"].format(format=self.out_format.upper()))
 
@@ -270,13 +318,65 @@ class ImageConversionWorker(QObject):
             self.conversion_error.emit(self.lang["error_during_conversion"].format(error=str(e)))
 
 
-# Widget Baru untuk Image Converter (Tidak ada perubahan)
+# --- PENAMBAHAN: Worker batch; konversi berjalan paralel di process pool (macan_convert) ---
+class BatchConversionWorker(QObject):
+    # jumlah selesai, total, nama file terakhir, teks throughput
+    file_converted = pyqtSignal(int, int, str, str)
+    # index file (1-based) yang gagal, pesan error
+    batch_error = pyqtSignal(int, str)
+    # ringkasan BatchStats.as_dict()
+    batch_finished = pyqtSignal(dict)
+
+    def __init__(self, files, output_path, out_format, resolution, quality_str, jobs, lang_dict=None,
+                 incremental=False, pipeline=False, stop_on_error=True, target_kb=None):
+        super().__init__()
+        self.files = list(files)
+        self.lang = lang_dict if lang_dict else CONVERTER_TEXT
+        self.engine = BatchConverter(output_path, out_format, resolution, quality_str, jobs=jobs,
+                                     incremental=incremental, pipeline=pipeline, stop_on_error=stop_on_error,
+                                     target_kb=target_kb)
+        self.first_error = None
+
+    def stop(self):
+        self.engine.stop()
+
+    def run(self):
+        index_of = {path: i for i, path in enumerate(self.files)}
+        try:
+            stats = self.engine.run(self.files, self._on_result)
+        except Exception as e:
+            self.batch_error.emit(0, self.lang["error_during_conversion"].format(error=str(e)))
+            return
+        if self.first_error is not None and self.engine.stop_on_error:
+            result = self.first_error
+            self.batch_error.emit(index_of[result.input_path] + 1, result.error)
+        else:
+            # Mode lanjut-saat-error: kegagalan dilaporkan di akhir (ConversionResult per file)
+            summary = stats.as_dict()
+            summary["failures"] = list(stats.failures)
+            self.batch_finished.emit(summary)
+
+    def _on_result(self, result, stats):
+        if not result.ok and self.first_error is None:
+            self.first_error = result
+        throughput = self.lang["batch_throughput"].format(
+            files_per_sec=stats.files_per_second, mb_per_sec=stats.mb_per_second)
+        if result.quality is not None:
+            throughput += "; " + self.lang["target_size_file"].format(
+                filename=os.path.basename(result.output_path), size_kb=result.bytes_out / 1024,
+                quality=result.quality, seconds=result.seconds)
+        self.file_converted.emit(stats.done, stats.total, os.path.basename(result.input_path), throughput)
+
+
+# Widget Baru untuk Image Converter
 class ImageConverterWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lang = CONVERTER_TEXT
         self.thread = None
         self.worker = None
+        self.batch_thread = None
+        self.batch_worker = None
         self.image_batch_files = []
         self.current_image_batch_index = 0
         
@@ -367,6 +467,44 @@ class ImageConverterWidget(QWidget):
         res_quality_layout.addWidget(self.img_quality_combo, 1)
 
         img_settings_layout.addLayout(res_quality_layout)
+
+        # --- PENAMBAHAN: Target ukuran file (KB) untuk JPEG/WEBP; 0 = pakai preset kualitas ---
+        target_layout = QHBoxLayout()
+        self.img_target_label = QLabel(self.lang["target_size_label"])
+        target_layout.addWidget(self.img_target_label)
+        self.img_target_spin = QSpinBox()
+        self.img_target_spin.setRange(0, 100000)
+        self.img_target_spin.setSingleStep(50)
+        self.img_target_spin.setSuffix(" KB")
+        self.img_target_spin.setSpecialValueText(self.lang["target_size_off"])
+        self.img_target_spin.valueChanged.connect(self._update_image_options)
+        target_layout.addWidget(self.img_target_spin)
+        target_layout.addStretch()
+        img_settings_layout.addLayout(target_layout)
+
+        # --- PENAMBAHAN: Jumlah proses paralel untuk batch mode ---
+        jobs_layout = QHBoxLayout()
+        self.img_jobs_label = QLabel(self.lang["jobs_label"])
+        jobs_layout.addWidget(self.img_jobs_label)
+        self.img_jobs_spin = QSpinBox()
+        self.img_jobs_spin.setRange(1, default_jobs() * 2)
+        self.img_jobs_spin.setValue(default_jobs())
+        jobs_layout.addWidget(self.img_jobs_spin)
+        jobs_layout.addStretch()
+        img_settings_layout.addLayout(jobs_layout)
+
+        # --- PENAMBAHAN: Batch incremental; file yang output-nya masih valid dilewati ---
+        self.img_incremental_checkbox = QCheckBox(self.lang["incremental_checkbox"])
+        self.img_incremental_checkbox.setChecked(False)
+        img_settings_layout.addWidget(self.img_incremental_checkbox)
+
+        # --- PENAMBAHAN: Mode pipeline read/transform/encode (macan_convert.ConversionPipeline) ---
+        self.img_pipeline_checkbox = QCheckBox(self.lang["pipeline_checkbox"])
+        img_settings_layout.addWidget(self.img_pipeline_checkbox)
+
+        # --- PENAMBAHAN: Batch tidak berhenti di file rusak; kegagalan dikumpulkan dan dilaporkan ---
+        self.img_continue_checkbox = QCheckBox(self.lang["continue_on_error_checkbox"])
+        img_settings_layout.addWidget(self.img_continue_checkbox)
         layout.addWidget(img_settings_frame)
 
         self.img_convert_btn = QPushButton(self.lang["start_img_conv_btn"])
@@ -409,6 +547,9 @@ class ImageConverterWidget(QWidget):
                 background-color: #4C566A; border: 1px solid #5E81AC; border-radius: 4px; padding: 6px;
             }
             QComboBox::drop-down { border: none; }
+            QSpinBox {
+                background-color: #4C566A; border: 1px solid #5E81AC; border-radius: 4px; padding: 6px;
+            }
             QProgressBar {
                 border: 1px solid #4C566A; border-radius: 4px; text-align: center; height: 10px;
             }
@@ -426,12 +567,25 @@ class ImageConverterWidget(QWidget):
             self.img_input_path_edit.setPlaceholderText(self.lang["input_placeholder_single_img"])
         self.img_input_path_edit.clear()
         self.image_batch_files = []
+        self.img_jobs_label.setVisible(is_batch)
+        self.img_jobs_spin.setVisible(is_batch)
+        self.img_incremental_checkbox.setVisible(is_batch)
+        self.img_pipeline_checkbox.setVisible(is_batch)
+        self.img_continue_checkbox.setVisible(is_batch)
 
     def _update_image_options(self):
         selected_format = self.img_format_combo.currentText().lower()
         has_quality = selected_format in ['jpeg', 'jpg', 'webp']
         self.img_quality_label.setVisible(has_quality)
         self.img_quality_combo.setVisible(has_quality)
+        self.img_target_label.setVisible(has_quality)
+        self.img_target_spin.setVisible(has_quality)
+        self.img_quality_combo.setEnabled(not self._image_target_kb())
+
+    def _image_target_kb(self):
+        if self.img_format_combo.currentText().lower() not in QUALITY_FORMATS:
+            return None
+        return self.img_target_spin.value() or None
 
     def browse_image_input_file(self):
         is_batch = self.img_batch_mode_checkbox.isChecked()
@@ -464,7 +618,7 @@ class ImageConverterWidget(QWidget):
                 QMessageBox.warning(self, self.lang["invalid_input_title"], self.lang["batch_no_files_msg"])
                 return
             self.current_image_batch_index = 0
-            self._start_next_batch_image_conversion()
+            self._start_parallel_batch_conversion()
         else:
             input_path = self.img_input_path_edit.text()
             if not input_path or not os.path.exists(input_path):
@@ -483,7 +637,8 @@ class ImageConverterWidget(QWidget):
         output_path = self.img_output_path_edit.text()
 
         self.thread = QThread()
-        self.worker = ImageConversionWorker(input_path, output_path, out_format, resolution, quality, self.lang)
+        self.worker = ImageConversionWorker(input_path, output_path, out_format, resolution, quality, self.lang,
+                                            target_kb=self._image_target_kb())
         self.worker.moveToThread(self.thread)
 
         self.thread.started.connect(self.worker.run)
@@ -493,51 +648,95 @@ class ImageConverterWidget(QWidget):
         
         self.thread.start()
 
-    def _start_next_batch_image_conversion(self):
-        if self.current_image_batch_index < len(self.image_batch_files):
-            input_path = self.image_batch_files[self.current_image_batch_index]
-            self.img_status_label.setText(
-                self.lang["converting_batch_file"].format(
-                    current=self.current_image_batch_index + 1,
-                    total=len(self.image_batch_files),
-                    filename=os.path.basename(input_path)
-                )
-            )
-            self._start_single_image_conversion(input_path)
+    # --- PENAMBAHAN: Batch paralel; hasil per file di-stream ke progress bar ---
+    def _start_parallel_batch_conversion(self):
+        self.img_convert_btn.setEnabled(False)
+        self.img_progress_bar.setValue(0)
+        self.img_status_label.setText(self.lang["preparing_conversion"].format(
+            filename=f"{len(self.image_batch_files)} file(s)"))
+
+        self.batch_thread = QThread()
+        self.batch_worker = BatchConversionWorker(
+            self.image_batch_files, self.img_output_path_edit.text(), self.img_format_combo.currentText(),
+            self.img_resolution_combo.currentText(), self.img_quality_combo.currentText(),
+            self.img_jobs_spin.value(), self.lang, incremental=self.img_incremental_checkbox.isChecked(),
+            pipeline=self.img_pipeline_checkbox.isChecked(),
+            stop_on_error=not self.img_continue_checkbox.isChecked(), target_kb=self._image_target_kb())
+        self.batch_worker.moveToThread(self.batch_thread)
+
+        self.batch_thread.started.connect(self.batch_worker.run)
+        self.batch_worker.file_converted.connect(self.on_batch_file_converted)
+        self.batch_worker.batch_finished.connect(self.on_batch_finished)
+        self.batch_worker.batch_error.connect(self.on_batch_error)
+        self.batch_thread.start()
+
+    def on_batch_file_converted(self, done, total, filename, throughput):
+        self.current_image_batch_index = done
+        text = self.lang["converting_batch_file"].format(current=done, total=total, filename=filename)
+        self.update_progress(self.img_progress_bar, self.img_status_label, int(done * 100 / total), f"{text} ({throughput})")
+
+    def on_batch_finished(self, stats):
+        self._stop_batch_thread()
+        failures = stats.get("failures") or []
+        if failures:
+            final_msg = self.lang["batch_complete_with_failures"].format(
+                ok=stats["done"] - stats["failed"], total=stats["total"], failed=stats["failed"])
         else:
-            final_msg = self.lang["batch_complete_msg"].format(count=len(self.image_batch_files))
-            self.img_status_label.setText(final_msg)
-            self.img_convert_btn.setEnabled(True)
-            QMessageBox.information(self, self.lang["batch_complete_title"], final_msg)
-            self._open_output_folder(self.img_output_path_edit.text())
-    
+            final_msg = self.lang["batch_complete_msg"].format(count=stats["done"])
+        final_msg += "\n" + self.lang["batch_throughput"].format(
+            files_per_sec=stats["files_per_second"], mb_per_sec=stats["mb_per_second"])
+        if stats["skipped"]:
+            final_msg += "\n" + self.lang["batch_skipped"].format(count=stats["skipped"])
+        if stats.get("stages"):
+            stage, info = max(stats["stages"].items(), key=lambda item: item[1]["utilization"])
+            final_msg += "\n" + self.lang["pipeline_bottleneck"].format(stage=stage, utilization=info["utilization"])
+        if failures:
+            final_msg += "\n" + self._write_failure_reports(failures)
+        self.img_status_label.setText(final_msg)
+        self.img_progress_bar.setValue(100)
+        self.img_convert_btn.setEnabled(True)
+        if failures:
+            question = final_msg + "\n\n" + self.lang["retry_failed_msg"].format(failed=len(failures))
+            reply = QMessageBox.question(self, self.lang["retry_failed_title"], question,
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.Yes:
+                self.image_batch_files = [result.input_path for result in failures]
+                self.img_input_path_edit.setText(f"{len(self.image_batch_files)} file(s) selected.")
+                self._start_parallel_batch_conversion()
+            return
+        QMessageBox.information(self, self.lang["batch_complete_title"], final_msg)
+        self._open_output_folder(self.img_output_path_edit.text())
+
+    def _write_failure_reports(self, failures):
+        """Laporan CSV (untuk spreadsheet) dan JSON di folder output; return teks status."""
+        base = os.path.join(self.img_output_path_edit.text(), f"macan_failures_{time.strftime('%Y%m%d_%H%M%S')}")
+        try:
+            csv_path = write_failure_report(base + ".csv", failures)
+            write_failure_report(base + ".json", failures)
+        except OSError as e:
+            return self.lang["failure_report_error"].format(error=e)
+        return self.lang["failure_report_saved"].format(path=csv_path)
+
+    def on_batch_error(self, index, msg):
+        self._stop_batch_thread()
+        error_msg = self.lang["error_in_batch"].format(index=index, error=msg)
+        self.conversion_error(self.img_convert_btn, self.img_progress_bar, self.img_status_label, error_msg)
+
+    def _stop_batch_thread(self):
+        if self.batch_thread:
+            self.batch_thread.quit()
+            self.batch_thread.wait()
+            self.batch_thread = None
+
+    # Handler di bawah hanya untuk konversi satu file; batch memakai on_batch_*
     def on_image_progress_update(self, value, text):
-        is_batch = self.img_batch_mode_checkbox.isChecked()
-        if is_batch and self.image_batch_files:
-            current_file_info = f"File {self.current_image_batch_index + 1}/{len(self.image_batch_files)}"
-            self.update_progress(self.img_progress_bar, self.img_status_label, value, f"({current_file_info}) {text}")
-        else:
-            self.update_progress(self.img_progress_bar, self.img_status_label, value, text)
+        self.update_progress(self.img_progress_bar, self.img_status_label, value, text)
 
     def on_image_conversion_finished(self, msg):
-        is_batch = self.img_batch_mode_checkbox.isChecked()
-        if is_batch and self.image_batch_files:
-            self.img_progress_bar.setValue(100)
-            self.current_image_batch_index += 1
-            if self.thread:
-                self.thread.quit()
-                self.thread.wait()
-            self._start_next_batch_image_conversion()
-        else:
-            self.conversion_finished(self.img_convert_btn, self.img_progress_bar, self.img_status_label, msg)
+        self.conversion_finished(self.img_convert_btn, self.img_progress_bar, self.img_status_label, msg)
 
     def on_image_conversion_error(self, msg):
-        is_batch = self.img_batch_mode_checkbox.isChecked()
-        if is_batch and self.image_batch_files:
-            error_msg = self.lang["error_in_batch"].format(index=self.current_image_batch_index + 1, error=msg)
-            self.conversion_error(self.img_convert_btn, self.img_progress_bar, self.img_status_label, error_msg)
-        else:
-            self.conversion_error(self.img_convert_btn, self.img_progress_bar, self.img_status_label, msg)
+        self.conversion_error(self.img_convert_btn, self.img_progress_bar, self.img_status_label, msg)
 
     def update_progress(self, progress_bar, status_label, value, text):
         progress_bar.setValue(value)
@@ -580,9 +779,14 @@ class ImageConverterWidget(QWidget):
             self.worker.stop()
             self.thread.quit()
             self.thread.wait()
+        if self.batch_thread and self.batch_thread.isRunning():
+            self.img_status_label.setText(self.lang["stopping_batch"])
+            self.batch_worker.stop()
+            self.batch_thread.quit()
+            self.batch_thread.wait()
         event.accept()
 
-# Kelas Dialog untuk fitur Resize Image (Tidak ada perubahan)
+# Kelas Dialog untuk fitur Resize Image
 class ResizeDialog(QDialog):
     def __init__(self, original_size, original_filesize, parent=None):
         super().__init__(parent)
@@ -663,6 +867,22 @@ class ResizeDialog(QDialog):
         options_layout.addWidget(self.file_type_combo)
         main_layout.addLayout(options_layout)
 
+        # --- PENAMBAHAN: Target ukuran file; kualitas dicari otomatis (JPG/WEBP) ---
+        target_layout = QHBoxLayout()
+        self.target_size_label = QLabel("Target size")
+        target_layout.addWidget(self.target_size_label)
+        self.target_size_spin = QSpinBox()
+        self.target_size_spin.setRange(0, 100000)
+        self.target_size_spin.setSingleStep(50)
+        self.target_size_spin.setSuffix(" KB")
+        self.target_size_spin.setSpecialValueText("Off (use quality)")
+        target_layout.addWidget(self.target_size_spin)
+        target_layout.addStretch()
+        main_layout.addLayout(target_layout)
+        self.file_type_combo.currentTextChanged.connect(self.update_target_size_state)
+        self.target_size_spin.valueChanged.connect(self.update_target_size_state)
+        self.update_target_size_state()
+
         self.current_label = QLabel()
         self.new_label = QLabel()
         main_layout.addWidget(self.current_label)
@@ -694,6 +914,12 @@ class ResizeDialog(QDialog):
             QPushButton:checked { background-color: #A3BE8C; }
         """)
     
+    def update_target_size_state(self, *args):
+        supports_target = self.file_type_combo.currentText().lower() in QUALITY_FORMATS
+        self.target_size_label.setEnabled(supports_target)
+        self.target_size_spin.setEnabled(supports_target)
+        self.quality_slider.setEnabled(not (supports_target and self.target_size_spin.value()))
+
     def on_mode_change(self, checked):
         is_pixels_mode = self.pixels_radio.isChecked()
         self.pixels_widget.setVisible(is_pixels_mode)
@@ -754,10 +980,166 @@ class ResizeDialog(QDialog):
             "width": int(self.width_edit.text()),
             "height": int(self.height_edit.text()),
             "quality": self.quality_slider.value(),
-            "format": self.file_type_combo.currentText().lower()
+            "format": self.file_type_combo.currentText().lower(),
+            "target_kb": self.target_size_spin.value() if self.target_size_spin.isEnabled() else 0
         }
 
 
+# --- PENAMBAHAN: Renderer gambar berbasis viewport ---
+class ImageCanvas(QWidget):
+    """
+    Pengganti QLabel untuk menampilkan gambar. Ukuran widget = ukuran gambar
+    setelah zoom, tapi paintEvent hanya menggambar area yang terlihat langsung
+    dari pixmap sumber, sehingga memori dan waktu per frame dibatasi ukuran
+    window, bukan level zoom.
+    """
+    # Dipancarkan dari worker tile; koneksi queued ke GUI thread
+    tile_ready = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.mip_levels = []      # [(faktor, pixmap)] versi sumber yang diperkecil 2x, 4x, ...
+        self.scaled_cache = None  # pixmap seukuran widget, hanya jika muat dalam viewport
+        self.tile_source = None   # TiledImage untuk gambar giga-piksel; source = overview-nya
+        self.last_visible_center = None
+        self.interactive = False  # True selama drag zoom: FastTransformation, tanpa scale halus
+        self.tile_ready.connect(self.update)
+
+    def set_interactive(self, interactive):
+        if self.interactive != interactive:
+            self.interactive = interactive
+            self.update()
+
+    def set_tile_source(self, tiled_image):
+        self.tile_source = tiled_image
+        self.last_visible_center = None
+        if tiled_image is not None:
+            tiled_image.on_tile_ready = lambda *tile: self.tile_ready.emit()
+        self.update()
+
+    def setPixmap(self, pixmap):
+        if pixmap is self.source:
+            return
+        self.source = pixmap
+        self.mip_levels = []
+        self.scaled_cache = None
+        self.update()
+
+    def pixmap(self):
+        return self.source
+
+    def clear(self):
+        self.setPixmap(None)
+
+    def resizeEvent(self, event):
+        self.scaled_cache = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self.source is None or self.source.isNull() or self.width() <= 0 or self.height() <= 0:
+            return
+        painter = QPainter(self)
+        exposed = event.rect()
+        if self.tile_source is not None and self._paint_tiles(painter, exposed):
+            painter.end()
+            return
+        if self._fits_viewport() and not self.interactive:
+            # Gambar muat di layar (mis. fit-to-window): scale sekali, pakai ulang saat repaint
+            if self.scaled_cache is None:
+                factor, pixmap = self._mip_for(self.source.width() / self.width())
+                self.scaled_cache = pixmap.scaled(self.size(), Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            painter.drawPixmap(exposed, self.scaled_cache, exposed)
+        else:
+            # Zoom besar: transform hanya potongan sumber yang terlihat
+            factor, pixmap = self._mip_for(self.source.width() / self.width())
+            sx = pixmap.width() / self.width()
+            sy = pixmap.height() / self.height()
+            source_rect = QRectF(exposed.x() * sx, exposed.y() * sy, exposed.width() * sx, exposed.height() * sy)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, not self.interactive)
+            painter.drawPixmap(QRectF(exposed), pixmap, source_rect)
+        painter.end()
+
+    def _paint_tiles(self, painter, exposed):
+        tiled = self.tile_source
+        scale = self.width() / tiled.width
+        level = tiled.level_for_scale(scale)
+        if level >= tiled.overview_level:
+            return False  # overview sudah cukup tajam untuk zoom ini
+
+        lw, lh = tiled.level_sizes[level]
+        sx, sy = lw / self.width(), lh / self.height()
+        ox, oy = self.source.width() / self.width(), self.source.height() / self.height()
+        cols, rows = tiled.tile_grid(level)
+        col_range = self._tile_range(exposed.left() * sx, (exposed.right() + 1) * sx, cols)
+        row_range = self._tile_range(exposed.top() * sy, (exposed.bottom() + 1) * sy, rows)
+
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, not self.interactive)
+        for row in row_range:
+            for col in col_range:
+                x, y = col * TILE_SIZE, row * TILE_SIZE
+                tw, th = min(TILE_SIZE, lw - x), min(TILE_SIZE, lh - y)
+                target = QRectF(x / sx, y / sy, tw / sx, th / sy)
+                tile = tiled.cached_tile(level, col, row)
+                if tile is not None:
+                    painter.drawImage(target, _numpy_to_qimage(tile))
+                else:
+                    # Sementara tile di-decode, tampilkan potongan overview yang di-upscale
+                    painter.drawPixmap(target, self.source, QRectF(target.x() * ox, target.y() * oy, target.width() * ox, target.height() * oy))
+                    tiled.request_tile(level, col, row)
+        self._prefetch_pan_tiles(level, sx, sy, cols, rows)
+        return True
+
+    def _prefetch_pan_tiles(self, level, sx, sy, cols, rows):
+        # Prefetch satu baris/kolom tile di luar area terlihat, searah gerakan pan
+        visible = self.visibleRegion().boundingRect()
+        if visible.isEmpty():
+            return
+        center = visible.center()
+        previous, self.last_visible_center = self.last_visible_center, (level, center)
+        if previous is None or previous[0] != level:
+            return
+        dx, dy = center.x() - previous[1].x(), center.y() - previous[1].y()
+        col_range = self._tile_range(visible.left() * sx, (visible.right() + 1) * sx, cols)
+        row_range = self._tile_range(visible.top() * sy, (visible.bottom() + 1) * sy, rows)
+        if not col_range or not row_range:
+            return
+        if dx:
+            col = col_range[-1] + 1 if dx > 0 else col_range[0] - 1
+            if 0 <= col < cols:
+                for row in row_range:
+                    self.tile_source.request_tile(level, col, row)
+        if dy:
+            row = row_range[-1] + 1 if dy > 0 else row_range[0] - 1
+            if 0 <= row < rows:
+                for col in col_range:
+                    self.tile_source.request_tile(level, col, row)
+
+    @staticmethod
+    def _tile_range(start, end, count):
+        first = max(0, int(start // TILE_SIZE))
+        last = min(count - 1, int((end - 1) // TILE_SIZE))
+        return range(first, last + 1)
+
+    def _fits_viewport(self):
+        viewport = self.parentWidget()
+        return viewport is not None and self.width() <= viewport.width() and self.height() <= viewport.height()
+
+    def _mip_for(self, downscale):
+        # Pilih level mip terkecil yang masih >= ukuran tampilan agar downscale tidak aliasing
+        factor, pixmap = 1, self.source
+        for level_factor, level_pixmap in self.mip_levels:
+            if level_factor > downscale:
+                return factor, pixmap
+            factor, pixmap = level_factor, level_pixmap
+        while factor * 2 <= downscale and pixmap.width() > 512 and pixmap.height() > 512:
+            factor *= 2
+            pixmap = pixmap.scaled(pixmap.width() // 2, pixmap.height() // 2,
+                                   Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            self.mip_levels.append((factor, pixmap))
+        return factor, pixmap
+
+
 class ImageViewer(QMainWindow):
     """
     Aplikasi Image & Video Viewer dengan PyQt6.
@@ -765,6 +1147,11 @@ class ImageViewer(QMainWindow):
     Fullscreen, Drag-and-Drop, Image Converter, Zoom Slider, Slideshow, Pan, Context Menu,
     Resize Dialog, Filmstrip, Save State, Video Playback, XMP Preset.
     """
+    # generation, file_path, image (numpy array atau None), faktor reduksi
+    image_decoded = pyqtSignal(int, str, object, int, object)
+    # Thread loader menemukan gambar giga-piksel: (generation, path, (w, h))
+    tiled_image_needed = pyqtSignal(int, str, object)
+
     def __init__(self):
         super().__init__()
 
@@ -782,6 +1169,8 @@ class ImageViewer(QMainWindow):
         self.current_media_type = None # 'image' or 'video'
         
         self.current_folder_files = []
+        self.current_folder_stats = {} # path -> (size, mtime_ns) dari scan folder
+        self.recent_folders = []       # folder terakhir dibuka, untuk warm-up thumbnail
         self.current_file_index = -1
         self.cv_image = None
         self.display_image = None
@@ -808,14 +1197,71 @@ class ImageViewer(QMainWindow):
         self.converter_widget = None
 
         self.slideshow_timer = QTimer(self)
+
+        # --- PENAMBAHAN: Zoom interaktif dua fase ---
+        # Selama slider/wheel bergerak: render cepat (maks. satu per frame), lalu satu render halus saat idle
+        self.zoom_render_timer = QTimer(self)
+        self.zoom_render_timer.setSingleShot(True)
+        self.zoom_render_timer.setInterval(16)
+        self.zoom_render_timer.timeout.connect(self._render_interactive_zoom)
+        self.zoom_idle_timer = QTimer(self)
+        self.zoom_idle_timer.setSingleShot(True)
+        self.zoom_idle_timer.setInterval(150)
+        self.zoom_idle_timer.timeout.connect(self._finish_interactive_zoom)
+
+        # --- PENAMBAHAN: Render ulang saat resize digabung per refresh layar, render halus saat selesai ---
+        self.resize_render_timer = QTimer(self)
+        self.resize_render_timer.setSingleShot(True)
+        self.resize_render_timer.timeout.connect(self._render_resize_preview)
+        self.resize_idle_timer = QTimer(self)
+        self.resize_idle_timer.setSingleShot(True)
+        self.resize_idle_timer.setInterval(150)
+        self.resize_idle_timer.timeout.connect(self._finish_resize)
         self.slideshow_running = False
         # --- PENAMBAHAN: Variabel untuk menyimpan state window sebelum slideshow ---
         self.pre_slideshow_geometry = None
         self.pre_slideshow_state = None
 
+        # --- PENAMBAHAN: Cache decode bersama + prefetch gambar sebelum/sesudah ---
+        self.image_cache = DecodedImageCache(DEFAULT_CACHE_BUDGET_MB)
+        # --- PENAMBAHAN: Ukuran header per (path, mtime, size); diisi thread loader/prefetch ---
+        self.image_headers = ImageHeaderCache()
+        self.prefetcher = ImagePrefetcher(
+            partial(self._decode_image, count_stats=False), radius=2, extensions=SUPPORTED_IMAGE_EXTENSIONS)
+        # --- PENAMBAHAN: Decode resolusi rendah untuk fit-to-window ---
+        self.image_reduce = 1          # faktor reduksi decode gambar aktif (1 = resolusi penuh)
+        self.image_full_size = None    # ukuran asli (w, h) dari header file
+        self.decode_viewport = None    # ukuran viewport (px fisik) untuk memilih faktor reduksi
+        # --- PENAMBAHAN: Loader asinkron; request navigasi baru menggantikan yang lama ---
+        self.load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="macan-loader")
+        self.load_future = None
+        self.load_generation = 0
+        self.image_decoded.connect(self._on_image_decoded)
+        self.tiled_image_needed.connect(self._on_tiled_image_needed)
+        # --- PENAMBAHAN: Gambar giga-piksel ditampilkan lewat pyramid tile ---
+        self.tiled_image = None
+        # Pembangunan pyramid punya executor sendiri agar navigasi tidak antre di
+        # belakangnya; dibatalkan lewat TiledImage.shutdown() saat pindah gambar.
+        self.tile_build_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="macan-pyramid")
+        # --- PENAMBAHAN: QPixmap dari display_image, dibuat ulang hanya saat piksel berubah ---
+        self.source_pixmap = None
+        self.source_pixmap_image = None
+        # --- PENAMBAHAN: Thumbnail persisten di ~/.cache/thumbnails (kompatibel file manager) ---
+        self.thumbnail_store = ThumbnailStore()
+        # --- PENAMBAHAN: Thumbnail EXIF / decode DCT-scaled sebelum decode penuh ---
+        self.thumbnail_decoder = ThumbnailDecoder(THUMBNAIL_SIZE)
+        # --- PENAMBAHAN: Pantau folder aktif; perubahan diterapkan sebagai delta ---
+        self.folder_watcher = QFileSystemWatcher(self)
+        self.folder_watcher.directoryChanged.connect(self._schedule_folder_refresh)
+        self.folder_refresh_timer = QTimer(self)
+        self.folder_refresh_timer.setSingleShot(True)
+        self.folder_refresh_timer.setInterval(300) # gabungkan burst event (copy/extract banyak file)
+        self.folder_refresh_timer.timeout.connect(self._refresh_folder_index)
 
         self.init_ui()
         self.load_settings()
+        self.thumbnail_store.start_maintenance(
+            self.recent_folders[:THUMBNAIL_WARMUP_FOLDERS], self._warm_thumbnail, SUPPORTED_IMAGE_EXTENSIONS)
 
     def init_ui(self):
         self.setWindowTitle('Macan Image Viewer')
@@ -850,13 +1296,11 @@ class ImageViewer(QMainWindow):
         """)
 
         # --- PERUBAHAN: Setup Image View ---
-        self.image_label = QLabel(self)
-        self.image_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-        self.image_label.setScaledContents(True)
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setMouseTracking(True)
+        # --- MODIFIKASI: QLabel diganti ImageCanvas yang hanya menggambar area terlihat ---
+        self.image_canvas = ImageCanvas(self)
+        self.image_canvas.setMouseTracking(True)
         self.scroll_area = QScrollArea()
-        self.scroll_area.setWidget(self.image_label)
+        self.scroll_area.setWidget(self.image_canvas)
         self.scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.scroll_area.setStyleSheet("QScrollArea { border: none; background-color: #1e1e1e; }")
         self.scroll_area.setMouseTracking(True)
@@ -888,7 +1332,7 @@ class ImageViewer(QMainWindow):
         main_layout.addWidget(self.media_stack)
         
         self._create_filmstrip()
-        main_layout.addWidget(self.filmstrip_scroll_area)
+        main_layout.addWidget(self.filmstrip_view)
 
         main_widget.setMouseTracking(True)
         self.setCentralWidget(main_widget)
@@ -897,12 +1341,12 @@ class ImageViewer(QMainWindow):
         self._create_actions()
         self._create_tool_bar()
 
-        self.rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self.image_label)
+        self.rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self.image_canvas)
         self.rubber_band.setStyleSheet("QRubberBand { border: 1px dashed white; background-color: rgba(255, 255, 255, 50); }")
 
-        self.image_label.mousePressEvent = self.image_mouse_press
-        self.image_label.mouseMoveEvent = self.image_mouse_move
-        self.image_label.mouseReleaseEvent = self.image_mouse_release
+        self.image_canvas.mousePressEvent = self.image_mouse_press
+        self.image_canvas.mouseMoveEvent = self.image_mouse_move
+        self.image_canvas.mouseReleaseEvent = self.image_mouse_release
         
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
@@ -1150,58 +1594,66 @@ class ImageViewer(QMainWindow):
         self.statusbar.addPermanentWidget(self.zoom_label)
         self.statusbar.addPermanentWidget(self.zoom_slider)
 
+    # --- MODIFIKASI: QListView + model; satu QPushButton per file diganti item virtual ---
     def _create_filmstrip(self):
-        self.filmstrip_scroll_area = QScrollArea()
-        self.filmstrip_scroll_area.setWidgetResizable(True)
-        self.filmstrip_scroll_area.setFixedHeight(120)
-        self.filmstrip_scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.filmstrip_scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.filmstrip_scroll_area.setStyleSheet("QScrollArea { background-color: #202020; border-top: 1px solid #555; }")
-
-        self.filmstrip_widget = QWidget()
-        self.filmstrip_layout = QHBoxLayout(self.filmstrip_widget)
-        self.filmstrip_layout.setContentsMargins(5, 5, 5, 5)
-        self.filmstrip_layout.setSpacing(10)
-        
-        self.filmstrip_scroll_area.setWidget(self.filmstrip_widget)
-        self.filmstrip_scroll_area.hide()
+        # --- MODIFIKASI: Tampilkan ikon video untuk file video ---
+        video_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_DriveDVDIcon).pixmap(VIDEO_ICON_SIZE)
+        self.thumbnail_service = ThumbnailService(self._load_thumbnail_image, parent=self)
+        self.filmstrip_model = FilmstripModel(self.thumbnail_service, video_icon, SUPPORTED_VIDEO_EXTENSIONS, self)
+        self.filmstrip_view = FilmstripView()
+        self.filmstrip_view.setModel(self.filmstrip_model)
+        self.filmstrip_view.visible_range_changed.connect(self.filmstrip_model.set_visible_range)
+        self.filmstrip_view.setFixedHeight(120)
+        self.filmstrip_view.setStyleSheet("QListView { background-color: #202020; border: none; border-top: 1px solid #555; }")
+        self.filmstrip_view.clicked.connect(self._on_filmstrip_clicked)
+        self.filmstrip_view.hide()
 
     def _populate_filmstrip(self):
-        while self.filmstrip_layout.count():
-            child = self.filmstrip_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        if not self.current_folder_files:
-            return
-
-        for index, file_path in enumerate(self.current_folder_files):
-            thumbnail_button = QPushButton()
-            thumbnail_button.setFixedSize(130, 100)
-            
-            # --- MODIFIKASI: Tampilkan ikon video untuk file video ---
-            _, ext = os.path.splitext(file_path)
-            if ext.lower() in SUPPORTED_VIDEO_EXTENSIONS:
-                video_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_DriveDVDIcon)
-                thumbnail_button.setIcon(video_icon)
-                thumbnail_button.setIconSize(QSize(64, 64))
-            else:
-                pixmap = QPixmap(file_path)
-                scaled_pixmap = pixmap.scaled(130, 100, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                thumbnail_button.setIcon(QIcon(scaled_pixmap))
-                thumbnail_button.setIconSize(QSize(120, 90))
-
-            thumbnail_button.setToolTip(os.path.basename(file_path))
-            
-            if index == self.current_file_index:
-                thumbnail_button.setStyleSheet("background-color: #5E81AC; border: 1px solid #88C0D0;")
-            else:
-                thumbnail_button.setStyleSheet("background-color: #3c3c3c;")
-
-            thumbnail_button.clicked.connect(partial(self.open_file, file_path))
-            self.filmstrip_layout.addWidget(thumbnail_button)
-            
-        self.filmstrip_layout.addStretch()
+        self.filmstrip_model.set_files(self.current_folder_files, self.current_file_index)
+
+    def _on_filmstrip_clicked(self, index):
+        self.open_file(index.data(Qt.ItemDataRole.UserRole))
+
+    def _load_thumbnail_image(self, file_path):
+        # Dipanggil dari worker ThumbnailService: hanya QImage, bukan QPixmap
+        image = self.thumbnail_store.load(file_path)
+        if image is None:
+            image = self._generate_thumbnail_image(file_path)
+            self.thumbnail_store.save(file_path, image)
+        return image
+
+    def _warm_thumbnail(self, file_path):
+        # Warm-up folder lama: langsung ke store, tanpa mengisi cache decode
+        self.thumbnail_store.save(file_path, self._generate_thumbnail_image(file_path, use_cache=False))
+
+    def _generate_thumbnail_image(self, file_path, use_cache=True):
+        # --- PENAMBAHAN: Video memakai frame di 10% durasi, bukan ikon generik ---
+        is_video = os.path.splitext(file_path)[1].lower() in SUPPORTED_VIDEO_EXTENSIONS
+        decode = self.thumbnail_decoder.decode_video if is_video else self.thumbnail_decoder.decode
+        if use_cache:
+            thumb = self.image_cache.get_or_load(file_path, decode, resolution='thumb')
+        else:
+            thumb = decode(file_path)
+        if thumb is None and not is_video:
+            # Format yang tidak bisa dibaca OpenCV (mis. GIF) tetap lewat Qt
+            return self.thumbnail_decoder.timed('qt', self._read_scaled_qimage, file_path)
+        if thumb is None:
+            return None
+        # Salin: buffer numpy milik cache bisa di-evict setelah QImage sampai di GUI thread
+        return _numpy_to_qimage(thumb).copy()
+
+    def _read_scaled_qimage(self, file_path):
+        reader = QImageReader(file_path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid():
+            # Plugin yang mendukung scaled decode (JPEG) tidak men-decode resolusi penuh
+            reader.setScaledSize(size.scaled(*THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio).boundedTo(size))
+        image = reader.read()
+        return None if image.isNull() else image
+
+    def _bgr_to_pixmap(self, image):
+        return QPixmap.fromImage(_numpy_to_qimage(image))
 
     def _update_action_states(self, enabled):
         is_image = enabled and self.current_media_type == 'image'
@@ -1239,6 +1691,13 @@ class ImageViewer(QMainWindow):
         for action in image_actions:
             action.setEnabled(is_image)
 
+        # Gambar giga-piksel hanya bisa dilihat (zoom/pan), tidak diedit atau disimpan ulang
+        if self.tiled_image is not None:
+            for action in [self.save_as_action, self.rotate_left_action, self.rotate_right_action,
+                           self.flip_horizontal_action, self.flip_vertical_action,
+                           self.crop_action, self.resize_action]:
+                action.setEnabled(False)
+
         self.zoom_slider.setEnabled(is_image)
         self.undo_action.setEnabled(is_image and bool(self.undo_stack))
         self.redo_action.setEnabled(is_image and bool(self.redo_stack))
@@ -1289,40 +1748,178 @@ class ImageViewer(QMainWindow):
                 self._populate_filmstrip()
             else:
                 self.current_file_index = self.current_folder_files.index(self.file_path)
-                for i in range(self.filmstrip_layout.count() -1):
-                    btn = self.filmstrip_layout.itemAt(i).widget()
-                    if i == self.current_file_index:
-                        btn.setStyleSheet("background-color: #5E81AC; border: 1px solid #88C0D0;")
-                    else:
-                        btn.setStyleSheet("background-color: #3c3c3c;")
+                self.filmstrip_model.set_current_row(self.current_file_index)
+            self.filmstrip_view.scroll_to_row(self.current_file_index)
 
+            self.prefetcher.update(self.current_folder_files, self.current_file_index)
             self._update_action_states(True)
             self.toggle_filmstrip(self.filmstrip_action.isChecked())
 
     # --- PENAMBAHAN: Logika terpisah untuk memuat gambar ---
+    # --- MODIFIKASI: Decode asinkron dengan token generasi; request lama dibuang ---
     def _load_image(self, file_path):
         self.current_media_type = 'image'
-        self.cv_image = cv2.imread(file_path)
-        if self.cv_image is None:
+        self._update_decode_viewport()
+        self.load_generation += 1
+        generation = self.load_generation
+        self._release_tiled_image()
+
+        # Batalkan decode sebelumnya yang belum sempat mulai
+        if self.load_future is not None:
+            self.load_future.cancel()
+
+        # Cache hit: tampilkan langsung tanpa lewat worker. GUI thread hanya os.stat;
+        # header yang belum pernah di-probe dibaca di thread loader.
+        stat_key = ImageHeaderCache.stat_key(file_path)
+        image_size = self.image_headers.get(stat_key)
+        if image_size is not None and not needs_tiling(image_size):
+            factor = pick_reduce_factor(image_size, self.decode_viewport)
+            image = self.image_cache.get(DecodedImageCache.key_from_stat(stat_key, factor))
+            if image is not None:
+                self._show_loaded_image(file_path, image, factor, image_size)
+                return
+        self.load_future = self.load_executor.submit(self._decode_in_background, generation, file_path)
+
+        self.cv_image = None
+        self.display_image = None
+        self.image_reduce = 1
+        self.image_full_size = None
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.media_stack.setCurrentWidget(self.scroll_area)
+        self._show_loading_placeholder(file_path)
+
+    def _decode_in_background(self, generation, file_path):
+        # Jalan di thread loader; hasil dikirim lewat signal ke GUI thread
+        if generation != self.load_generation:
+            return
+        image_size = self.image_headers.probe(file_path)
+        if needs_tiling(image_size):
+            self.tiled_image_needed.emit(generation, file_path, image_size)
+            return
+        self.prefetcher.wait_for(file_path)
+        image, factor = self._decode_image(file_path, count_stats=False)
+        self.image_decoded.emit(generation, file_path, image, factor, image_size)
+
+    def _on_tiled_image_needed(self, generation, file_path, image_size):
+        if generation != self.load_generation or file_path != self.file_path:
+            return
+        self.tiled_image = TiledImage(file_path, image_size, self.image_cache)
+        self.tile_build_executor.submit(self._prepare_tiled_in_background, generation, self.tiled_image)
+
+    def _prepare_tiled_in_background(self, generation, tiled):
+        if generation != self.load_generation:
+            return
+        try:
+            if not tiled.prepare():
+                return  # dibatalkan oleh navigasi
+            overview = tiled.overview()
+        except Exception as e:
+            print(f"Failed to prepare tiled image {tiled.path}: {e}")
+            overview = None
+        self.image_decoded.emit(generation, tiled.path, overview, tiled.overview_factor, (tiled.width, tiled.height))
+
+    def _release_tiled_image(self):
+        if self.tiled_image is not None:
+            self.tiled_image.shutdown()
+            self.tiled_image = None
+        self.image_canvas.set_tile_source(None)
+
+    def _on_image_decoded(self, generation, file_path, image, factor, image_size):
+        # Hasil decode yang sudah digantikan navigasi berikutnya dibuang
+        if generation != self.load_generation or file_path != self.file_path:
+            return
+        self._show_loaded_image(file_path, image, factor, image_size)
+
+    def _show_loading_placeholder(self, file_path):
+        self.filename_label.setText(f" {os.path.basename(file_path)}")
+        self.statusbar.showMessage(f"Loading {os.path.basename(file_path)}...")
+        thumb = self.image_cache.get(DecodedImageCache.make_key(file_path, 'thumb'), count_stats=False)
+        if thumb is not None:
+            placeholder = self._bgr_to_pixmap(thumb)
+        else:
+            # Thumbnail dari store disk hanya ada sebagai pixmap di model filmstrip
+            placeholder = self.filmstrip_model.pixmaps.get(file_path)
+            if placeholder is None:
+                return
+        self.image_canvas.setPixmap(placeholder)
+        self.image_canvas.resize(placeholder.size().scaled(self.scroll_area.size(), Qt.AspectRatioMode.KeepAspectRatio))
+
+    def _show_loaded_image(self, file_path, image, factor, image_size=None):
+        self.statusbar.clearMessage()
+        if image is None:
             self.statusbar.showMessage(f"Error: Failed to open image {os.path.basename(file_path)}", 5000)
             self.current_media_type = None
+            self.image_canvas.clear()
             return
-            
-        self.display_image = self.cv_image.copy()
+
+        # Array dari cache bersifat read-only dan dipakai bersama, tidak perlu di-copy.
+        # Operasi edit selalu menghasilkan array baru (lihat _editable_image).
+        self.cv_image = self.display_image = image
+        self.image_reduce = factor
+        if self.tiled_image is not None:
+            # display_image = overview; detail diambil dari tile sesuai zoom
+            self.image_full_size = (self.tiled_image.width, self.tiled_image.height)
+            self.image_canvas.set_tile_source(self.tiled_image)
+        else:
+            self.image_full_size = image_size if factor > 1 else None
         self.undo_stack.clear()
         self.redo_stack.clear()
-        self.fit_to_window = True 
-        
+        self.fit_to_window = True
+
         self.media_stack.setCurrentWidget(self.scroll_area) # Tampilkan view gambar
-        
+
         self._display_image()
         self._update_status_bar()
+        self._update_action_states(True)
+
+    def _update_decode_viewport(self):
+        # Sebelum window tampil, ukuran scroll area belum final; pakai ukuran window
+        size = self.scroll_area.size() if self.isVisible() else self.size()
+        ratio = self.devicePixelRatioF()
+        self.decode_viewport = (int(size.width() * ratio), int(size.height() * ratio))
+
+    def _decode_image(self, file_path, full_resolution=False, count_stats=True):
+        # Dipanggil juga dari thread prefetch/loader: jangan menyentuh widget di sini
+        image_size = self.image_headers.probe(file_path)
+        if needs_tiling(image_size):
+            return None, 1  # gambar giga-piksel hanya dibuka lewat TiledImage
+        factor = 1
+        if not full_resolution:
+            factor = pick_reduce_factor(image_size, self.decode_viewport)
+        key = DecodedImageCache.make_key(file_path, factor)
+        image = self.image_cache.get(key, count_stats)
+        if image is None:
+            image = imread_reduced(file_path, factor)
+            self.image_cache.put(key, image)
+        return image, factor
+
+    def _ensure_full_resolution(self):
+        """Decode ulang gambar aktif pada resolusi penuh sebelum zoom/edit yang butuh piksel asli."""
+        if self.image_reduce == 1 or not self.file_path or self.tiled_image is not None:
+            return
+        image, _ = self._decode_image(self.file_path, full_resolution=True)
+        if image is None:
+            return
+        self.cv_image = self.display_image = image
+        self.image_reduce = 1
+        self.image_full_size = None
+
+    def _full_image_size(self):
+        if self.image_reduce > 1 and self.image_full_size:
+            return self.image_full_size
+        h, w = self.display_image.shape[:2]
+        return w, h
 
     # --- PENAMBAHAN: Logika terpisah untuk memuat video ---
     def _load_video(self, file_path):
         self.current_media_type = 'video'
+        self.load_generation += 1
+        self._release_tiled_image()
         self.cv_image = None
         self.display_image = None
+        self.image_reduce = 1
+        self.image_full_size = None
         
         self.media_stack.setCurrentWidget(self.video_widget) # Tampilkan view video
         
@@ -1395,7 +1992,7 @@ class ImageViewer(QMainWindow):
         self.is_cropping = False
         self.rubber_band.hide()
         self.crop_button.hide()
-        self.image_label.unsetCursor()
+        self.image_canvas.unsetCursor()
         self.statusbar.showMessage("Crop cancelled.", 2000)
         if self.is_in_crop_mode:
             self.crop_action.setChecked(False)
@@ -1459,7 +2056,7 @@ class ImageViewer(QMainWindow):
             elif self.is_pannable():
                 self.is_panning = True
                 self.pan_last_pos = event.pos()
-                self.image_label.setCursor(Qt.CursorShape.ClosedHandCursor)
+                self.image_canvas.setCursor(Qt.CursorShape.ClosedHandCursor)
 
     def image_mouse_move(self, event):
         if self.is_panning:
@@ -1472,16 +2069,16 @@ class ImageViewer(QMainWindow):
         elif self.is_cropping:
             self.rubber_band.setGeometry(QRect(self.origin_point, event.position().toPoint()).normalized())
         elif self.is_in_crop_mode:
-            self.image_label.setCursor(Qt.CursorShape.CrossCursor)
+            self.image_canvas.setCursor(Qt.CursorShape.CrossCursor)
         elif self.is_pannable():
-            self.image_label.setCursor(Qt.CursorShape.OpenHandCursor)
+            self.image_canvas.setCursor(Qt.CursorShape.OpenHandCursor)
         else:
-            self.image_label.unsetCursor()
+            self.image_canvas.unsetCursor()
             
     def image_mouse_release(self, event):
         if self.is_panning:
             self.is_panning = False
-            self.image_label.setCursor(Qt.CursorShape.OpenHandCursor)
+            self.image_canvas.setCursor(Qt.CursorShape.OpenHandCursor)
         elif self.is_cropping:
             if self.origin_point == event.position().toPoint():
                 self.cancel_crop()
@@ -1489,22 +2086,15 @@ class ImageViewer(QMainWindow):
 
             self.is_cropping = False
             selection_rect = self.rubber_band.geometry()
-            if not self.image_label.pixmap(): return
-            pixmap_rect = self.image_label.pixmap().rect()
-            
-            pixmap_display_x = (self.image_label.width() - pixmap_rect.width()) / 2
-            pixmap_display_y = (self.image_label.height() - pixmap_rect.height()) / 2
-
-            relative_x = selection_rect.x() - pixmap_display_x
-            relative_y = selection_rect.y() - pixmap_display_y
-            
-            scaled_selection = QRect(int(relative_x), int(relative_y), selection_rect.width(), selection_rect.height())
-            scaled_selection = scaled_selection.intersected(pixmap_rect)
+            if not self.image_canvas.pixmap(): return
+            # Canvas selalu seukuran gambar yang ditampilkan, jadi seleksi langsung dipetakan ke piksel
+            canvas_rect = self.image_canvas.rect()
+            scaled_selection = selection_rect.intersected(canvas_rect)
             
             if scaled_selection.width() > 5 and scaled_selection.height() > 5:
-                img_h, img_w, _ = self.display_image.shape
-                scale_x = img_w / pixmap_rect.width() if pixmap_rect.width() > 0 else 0
-                scale_y = img_h / pixmap_rect.height() if pixmap_rect.height() > 0 else 0
+                img_h, img_w = self.display_image.shape[:2]
+                scale_x = img_w / canvas_rect.width() if canvas_rect.width() > 0 else 0
+                scale_y = img_h / canvas_rect.height() if canvas_rect.height() > 0 else 0
 
                 self.crop_x = int(scaled_selection.x() * scale_x)
                 self.crop_y = int(scaled_selection.y() * scale_y)
@@ -1541,8 +2131,12 @@ class ImageViewer(QMainWindow):
         self.is_in_crop_mode = checked
         if checked:
             self.stop_slideshow()
+            # Koordinat crop dihitung dari piksel gambar, jadi butuh resolusi penuh
+            if self.image_reduce > 1:
+                self._ensure_full_resolution()
+                self._display_image()
             self.statusbar.showMessage("Crop mode enabled. Drag to select an area.", 3000)
-            self.image_label.setCursor(Qt.CursorShape.CrossCursor)
+            self.image_canvas.setCursor(Qt.CursorShape.CrossCursor)
         else:
             self.statusbar.showMessage("Crop mode disabled.", 2000)
             self.cancel_crop()
@@ -1571,7 +2165,7 @@ class ImageViewer(QMainWindow):
         # Sembunyikan UI dan masuk ke fullscreen
         self.tool_bar.hide()
         self.statusbar.hide()
-        self.filmstrip_scroll_area.hide()
+        self.filmstrip_view.hide()
         self.showFullScreen()
         
         self.slideshow_action.setIcon(self._create_svg_icon(self.pause_svg))
@@ -1599,7 +2193,7 @@ class ImageViewer(QMainWindow):
         self.tool_bar.show()
         self.statusbar.show()
         if self.filmstrip_action.isChecked():
-            self.filmstrip_scroll_area.show()
+            self.filmstrip_view.show()
         
         # Keluar dari fullscreen dan kembalikan ke state sebelumnya
         self.setWindowState(self.pre_slideshow_state)
@@ -1644,7 +2238,7 @@ class ImageViewer(QMainWindow):
         collage_action.triggered.connect(self.open_brightness_contrass_gamma)
         context_menu.addSeparator()
 
-        if self.current_media_type == 'image':
+        if self.current_media_type == 'image' and self.tiled_image is None:
             # --- PENAMBAHAN: Menu Preset ---
             presets_menu = context_menu.addMenu("Presets")
             manage_presets_action = presets_menu.addAction("Manage Presets...")
@@ -1720,10 +2314,21 @@ class ImageViewer(QMainWindow):
             )
             
             if self.current_media_type == 'image' and self.cv_image is not None:
-                h, w, _ = self.display_image.shape
+                w, h = self._full_image_size()
                 info_text += f"<b>Dimensions:</b> {w} x {h} pixels<br>"
 
-            info_text += f"<b>File Size:</b> {filesize_str} ({size_bytes:,} bytes)"
+            info_text += f"<b>File Size:</b> {filesize_str} ({size_bytes:,} bytes)<br>"
+
+            cache_stats = self.image_cache.stats()
+            info_text += (f"<b>Image Cache:</b> {cache_stats['hit_rate']:.0%} hit rate, "
+                          f"{cache_stats['bytes_held']/1024**2:.1f} / {cache_stats['budget_bytes']/1024**2:.0f} MB "
+                          f"({cache_stats['entries']} entries)")
+
+            thumb_stats = self.thumbnail_decoder.stats()
+            if thumb_stats:
+                info_text += "<br><b>Thumbnails:</b> " + ", ".join(
+                    f"{name} {stat['hits']}/{stat['hits'] + stat['misses']} ({stat['avg_ms']:.1f} ms avg)"
+                    for name, stat in thumb_stats.items())
             
             msg_box = QMessageBox(self)
             msg_box.setWindowTitle("File Info")
@@ -1738,7 +2343,7 @@ class ImageViewer(QMainWindow):
         self._push_to_undo_stack()
         self.statusbar.showMessage(f"Applying {effect_function.__name__.replace('apply_', '')} effect...", 2000)
         # Terapkan efeknya
-        self.display_image = effect_function(self.display_image)
+        self.display_image = effect_function(self._editable_image())
         self.fit_to_window = False # Efek mungkin mengubah ukuran, jadi nonaktifkan fit
         self._display_image()
         self.statusbar.showMessage("Effect applied successfully.", 3000)    
@@ -1751,7 +2356,7 @@ class ImageViewer(QMainWindow):
     def open_brightness_contrass_gamma(self):
         if self.display_image is None: return # Tambahkan pengecekan ini
     
-        dialog = AdjustmentsDialog(self.display_image, self) # <-- PERUBAHAN DI SINI
+        dialog = AdjustmentsDialog(self._editable_image(), self) # <-- PERUBAHAN DI SINI
         if dialog.exec():
             self._push_to_undo_stack()
             self.display_image = dialog.get_result_image()
@@ -1772,7 +2377,7 @@ class ImageViewer(QMainWindow):
         self.statusbar.showMessage("Applying preset...", 2000)
         
         try:
-            self.display_image = apply_preset(self.display_image, settings)
+            self.display_image = apply_preset(self._editable_image(), settings)
             self._display_image()
             self.statusbar.showMessage("Preset applied successfully.", 3000)
         except Exception as e:
@@ -1786,7 +2391,8 @@ class ImageViewer(QMainWindow):
 
     def resize_image(self):
         if self.current_media_type != 'image' or self.display_image is None or not self.file_path: return
-        
+
+        self._ensure_full_resolution()
         original_size = (self.display_image.shape[1], self.display_image.shape[0])
         filesize = os.path.getsize(self.file_path)
         
@@ -1805,7 +2411,10 @@ class ImageViewer(QMainWindow):
                 filter_str = f"{values['format'].upper()} (*.{values['format']})"
                 save_path, _ = QFileDialog.getSaveFileName(self, "Save Resized Image As...", os.path.join(self.last_directory, default_filename), filter_str)
                 
-                if save_path:
+                if save_path and values["target_kb"]:
+                    self.last_directory = os.path.dirname(save_path)
+                    self._save_resized_to_target(resized_image, save_path, values)
+                elif save_path:
                     self.last_directory = os.path.dirname(save_path)
                     params = []
                     if values['format'] in ['jpg', 'jpeg']:
@@ -1819,6 +2428,31 @@ class ImageViewer(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Resize Error", f"An error occurred while resizing or saving the image:\n{e}")
 
+    # --- PENAMBAHAN: Simpan hasil resize dengan kualitas tertinggi yang muat di target ukuran ---
+    def _save_resized_to_target(self, resized_image, save_path, values):
+        if resized_image.ndim == 2:
+            pil_image = Image.fromarray(resized_image)
+        elif resized_image.shape[2] == 4:
+            pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGRA2RGBA))
+        else:
+            pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB))
+        if values["format"] in ['jpg', 'jpeg'] and pil_image.mode in ('RGBA', 'LA', 'P'):
+            pil_image = pil_image.convert('RGB')
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            result = encode_to_target_size(pil_image, values["format"], values["target_kb"] * 1024)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if not result.fits:
+            QMessageBox.warning(self, "Target Size", target_size_error(values["target_kb"], result))
+            return
+        with open(save_path, "wb") as f:
+            f.write(result.data)
+        self.statusbar.showMessage(
+            f"Resized image saved to {save_path} ({len(result.data) / 1024:.0f} KB, quality {result.quality}, "
+            f"{result.seconds:.2f} s)", 6000)
+
     def visual_search(self):
         if self.current_media_type == 'image' and self.file_path:
             self.statusbar.showMessage("Uploading image to Google Lens...", 5000)
@@ -1860,20 +2494,19 @@ class ImageViewer(QMainWindow):
                 self.statusbar.showMessage(error_message, 5000)
             
     def toggle_filmstrip(self, checked):
-        self.filmstrip_scroll_area.setVisible(checked)
+        self.filmstrip_view.setVisible(checked)
         self.filmstrip_action.setChecked(checked)
 
     # --- MODIFIKASI: Cari semua file media yang didukung ---
+    # --- MODIFIKASI: Satu pass os.scandir (ekstensi case-insensitive) menggantikan 22x glob ---
     def _load_current_folder_files(self):
         if self.file_path:
             folder = os.path.dirname(self.file_path)
-            all_files = []
-            for ext in ALL_SUPPORTED_EXTENSIONS:
-                all_files.extend(glob(os.path.join(folder, f"*{ext}")))
-                all_files.extend(glob(os.path.join(folder, f"*{ext.upper()}")))
-
-            # Hilangkan duplikat dan urutkan
-            self.current_folder_files = sorted(list(set(all_files)), key=os.path.basename)
+            entries = scan_media_folder(folder, ALL_SUPPORTED_EXTENSIONS)
+            self.current_folder_files = [entry.path for entry in entries]
+            self.current_folder_stats = {entry.path: (entry.size, entry.mtime) for entry in entries}
+            self._watch_folder(folder)
+            self._remember_folder(folder)
 
             try:
                 self.current_file_index = self.current_folder_files.index(self.file_path)
@@ -1881,46 +2514,101 @@ class ImageViewer(QMainWindow):
                 self.current_file_index = -1
         else:
             self.current_folder_files = []
+            self.current_folder_stats = {}
             self.current_file_index = -1
+            self._watch_folder(None)
         self._update_action_states(self.file_path is not None)
 
-    def _display_image(self):
-        if self.display_image is None:
-            self.image_label.clear()
+    # --- PENAMBAHAN: Index folder live (QFileSystemWatcher) ---
+    def _watch_folder(self, folder):
+        watched = self.folder_watcher.directories()
+        if folder and watched == [folder]:
+            return
+        if watched:
+            self.folder_watcher.removePaths(watched)
+        if folder:
+            self.folder_watcher.addPath(folder)
+
+    def _remember_folder(self, folder):
+        if folder in self.recent_folders:
+            self.recent_folders.remove(folder)
+        self.recent_folders.insert(0, folder)
+        del self.recent_folders[THUMBNAIL_WARMUP_FOLDERS:]
+
+    def _schedule_folder_refresh(self, folder):
+        self.folder_refresh_timer.start()
+
+    def _refresh_folder_index(self):
+        """
+        Terapkan perubahan folder (tambah, hapus, rename, modifikasi) ke
+        current_folder_files dan filmstrip tanpa membangun ulang thumbnail lain.
+        """
+        if not self.file_path:
             return
+        folder = os.path.dirname(self.file_path)
+        entries = scan_media_folder(folder, ALL_SUPPORTED_EXTENSIONS)
+        added, removed, modified, renamed = diff_folder_entries(self.current_folder_stats, entries)
+        if not (added or removed or modified):
+            return
+
+        # File aktif di-rename dari luar: ikuti nama barunya
+        if self.file_path in renamed:
+            self.file_path = renamed[self.file_path]
+            self.setWindowTitle(f'{os.path.basename(self.file_path)} - Macan Viewer')
 
-        # --- AWAL PERUBAHAN ---
-        h_orig, w_orig, *channels = self.display_image.shape
-        num_channels = channels[0] if channels else 3 # Default ke 3 jika tidak ada channel info
+        new_files = [entry.path for entry in entries]
+        self.current_folder_stats = {entry.path: (entry.size, entry.mtime) for entry in entries}
 
-        if num_channels == 4:
-            # Handle gambar BGRA (dengan alpha)
-            rgb_image = cv2.cvtColor(self.display_image, cv2.COLOR_BGRA2RGBA)
-            bytes_per_line = num_channels * w_orig
-            qt_image = QImage(rgb_image.data, w_orig, h_orig, bytes_per_line, QImage.Format.Format_RGBA8888)
-        else:
-            # Handle gambar BGR standar
-            rgb_image = cv2.cvtColor(self.display_image, cv2.COLOR_BGR2RGB)
-            bytes_per_line = 3 * w_orig
-            qt_image = QImage(rgb_image.data, w_orig, h_orig, bytes_per_line, QImage.Format.Format_RGB888)
-        # --- AKHIR PERUBAHAN ---
+        # Filmstrip: semua delta diterapkan dalam satu panggilan (index baris dibangun ulang sekali)
+        removed_set = set(removed)
+        removed_rows = [index for index, file_path in enumerate(self.current_folder_files)
+                        if file_path in removed_set]
+        added_set = set(added)
+        inserted_rows = [index for index, file_path in enumerate(new_files) if file_path in added_set]
+        self.filmstrip_model.apply_changes(new_files, removed_rows, inserted_rows)
+        for file_path in modified:
+            self.filmstrip_model.refresh_file(file_path)
+
+        self.current_folder_files = new_files
+        try:
+            self.current_file_index = self.current_folder_files.index(self.file_path)
+        except ValueError:
+            # File aktif dihapus: gambarnya tetap tampil, tapi tidak lagi ada di folder
+            self.current_file_index = -1
+            self.statusbar.showMessage(f"{os.path.basename(self.file_path)} was removed from the folder", 5000)
+
+        self.filmstrip_model.set_current_row(self.current_file_index)
+        self.prefetcher.update(self.current_folder_files, self.current_file_index)
+        self._update_action_states(True)
+
+    def _display_image(self):
+        if self.display_image is None:
+            self.image_canvas.clear()
+            return
 
-        pixmap = QPixmap.fromImage(qt_image)
+        # --- MODIFIKASI: Konversi ke QPixmap di-cache; zoom/resize hanya membayar scaling ---
+        # --- MODIFIKASI: Tidak ada lagi pixmap ter-zoom; canvas menggambar area terlihat saja ---
+        # zoom_factor selalu relatif terhadap ukuran asli, walau yang di-decode versi reduksi
+        full_w, full_h = self._full_image_size()
         if self.fit_to_window:
+            display_size = QSize(full_w, full_h)
             scroll_area_size = self.scroll_area.size()
-            if w_orig > scroll_area_size.width() or h_orig > scroll_area_size.height():
-                scaled_pixmap = pixmap.scaled(scroll_area_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            else:
-                scaled_pixmap = pixmap
-            if w_orig > 0: self.zoom_factor = scaled_pixmap.width() / w_orig
+            if full_w > scroll_area_size.width() or full_h > scroll_area_size.height():
+                display_size = display_size.scaled(scroll_area_size, Qt.AspectRatioMode.KeepAspectRatio)
+            if full_w > 0: self.zoom_factor = display_size.width() / full_w
         else:
-            display_w = int(w_orig * self.zoom_factor)
-            display_h = int(h_orig * self.zoom_factor)
-            scaled_pixmap = pixmap.scaled(display_w, display_h, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        self.image_label.setPixmap(scaled_pixmap)
-        self.image_label.resize(scaled_pixmap.size())
+            display_size = QSize(max(1, int(full_w * self.zoom_factor)), max(1, int(full_h * self.zoom_factor)))
+        self.image_canvas.setPixmap(self._source_pixmap())
+        self.image_canvas.resize(display_size)
         self._update_status_bar()
 
+    def _source_pixmap(self):
+        # Setiap edit menghasilkan array baru, jadi identitas array = versi piksel
+        if self.source_pixmap_image is not self.display_image:
+            self.source_pixmap = QPixmap.fromImage(_numpy_to_qimage(self.display_image))
+            self.source_pixmap_image = self.display_image
+        return self.source_pixmap
+
     # --- REVISI: Perbarui status bar untuk gambar dan video ---
     def _update_status_bar(self):
         if self.file_path and os.path.exists(self.file_path):
@@ -1930,12 +2618,15 @@ class ImageViewer(QMainWindow):
             self.filesize_label.setText(f" {filesize_str} ")
             
             if self.current_media_type == 'image' and self.display_image is not None:
-                h, w, _ = self.display_image.shape
+                w, h = self._full_image_size()
                 self.dimensions_label.setText(f" {w} x {h} ")
                 self.zoom_label.setText(f" {int(self.zoom_factor * 100)}% ")
                 new_slider_value = int(self.zoom_factor * 100)
                 if self.zoom_slider.value() != new_slider_value:
+                    # Sinkronisasi tampilan saja; jangan memicu slider_zoom (yang mematikan fit-to-window)
+                    self.zoom_slider.blockSignals(True)
                     self.zoom_slider.setValue(new_slider_value)
+                    self.zoom_slider.blockSignals(False)
             elif self.current_media_type == 'video':
                 self.dimensions_label.setText(" Video ")
                 self.zoom_label.setText(" ")
@@ -1945,8 +2636,16 @@ class ImageViewer(QMainWindow):
             self.filesize_label.setText(" ")
             self.zoom_label.setText(" ")
 
+    def _editable_image(self):
+        # Gambar dari cache read-only; copy sekali sebelum diberikan ke fungsi yang mungkin edit in-place
+        self._ensure_full_resolution()
+        if self.display_image is not None and not self.display_image.flags.writeable:
+            self.display_image = self.display_image.copy()
+        return self.display_image
+
     def _push_to_undo_stack(self):
         if self.display_image is not None:
+            self._ensure_full_resolution()
             self.undo_stack.append(self.display_image.copy())
             self.redo_stack.clear()
             self._update_action_states(True)
@@ -1955,6 +2654,7 @@ class ImageViewer(QMainWindow):
         if self.current_media_type != 'image' or self.display_image is None: return
         self.fit_to_window = False
         self.zoom_factor = min(self.zoom_factor * 1.25, 8.0)
+        self._ensure_resolution_for_zoom()
         self._display_image()
 
     def zoom_out(self):
@@ -1972,8 +2672,29 @@ class ImageViewer(QMainWindow):
         if self.current_media_type != 'image' or self.display_image is None: return
         self.fit_to_window = False
         self.zoom_factor = value / 100.0
+        # Tick beruntun digabung: paling banyak satu render cepat yang tertunda
+        self.image_canvas.set_interactive(True)
+        if not self.zoom_render_timer.isActive():
+            self.zoom_render_timer.start()
+        self.zoom_idle_timer.start()
+
+    def _render_interactive_zoom(self):
+        if self.current_media_type != 'image' or self.display_image is None: return
+        self._ensure_resolution_for_zoom()
         self._display_image()
 
+    def _finish_interactive_zoom(self):
+        if self.zoom_render_timer.isActive():
+            self.zoom_idle_timer.start()
+            return
+        self.image_canvas.set_interactive(False)
+
+    def _ensure_resolution_for_zoom(self):
+        # Upgrade ke resolusi penuh hanya jika zoom menampilkan lebih banyak piksel dari hasil decode.
+        # Gambar ter-tile tidak perlu: canvas mengambil tile level yang sesuai.
+        if self.zoom_factor * self.image_reduce > 1.0 and self.tiled_image is None:
+            self._ensure_full_resolution()
+
     def rotate_left(self):
         if self.display_image is not None:
             self._push_to_undo_stack()
@@ -1996,6 +2717,7 @@ class ImageViewer(QMainWindow):
 
     def save_image_as(self):
         if self.display_image is None: return
+        self._ensure_full_resolution()
         default_path = os.path.join(self.last_directory, os.path.basename(self.file_path) if self.file_path else "")
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Image As...", default_path,"PNG (*.png);;JPG (*.jpg);;BMP (*.bmp)")
         if file_path:
@@ -2007,8 +2729,8 @@ class ImageViewer(QMainWindow):
                 self.statusbar.showMessage(f"Failed to save image: {e}", 5000)
 
     def copy_image_to_clipboard(self):
-        if self.current_media_type == 'image' and self.image_label.pixmap():
-            QApplication.clipboard().setPixmap(self.image_label.pixmap())
+        if self.current_media_type == 'image' and self.image_canvas.pixmap():
+            QApplication.clipboard().setPixmap(self.image_canvas.pixmap())
             self.statusbar.showMessage("Image copied to clipboard", 3000)
 
     # --- REFAKTOR: Ganti nama fungsi navigasi ---
@@ -2037,14 +2759,14 @@ class ImageViewer(QMainWindow):
             self._update_action_states(True)
 
     def print_image(self):
-        if self.current_media_type != 'image' or self.image_label.pixmap() is None: return
+        if self.current_media_type != 'image' or self.image_canvas.pixmap() is None: return
         printer = QPrinter(QPrinter.PrinterMode.HighResolution)
         dialog = QPrintDialog(printer, self)
         if dialog.exec() == QPrintDialog.DialogCode.Accepted:
             painter = QPainter()
             painter.begin(printer)
             rect = painter.viewport()
-            pixmap = self.image_label.pixmap()
+            pixmap = self.image_canvas.pixmap()
             size = pixmap.size()
             size.scale(rect.size(), Qt.AspectRatioMode.KeepAspectRatio)
             painter.setViewport(rect.x(), rect.y(), size.width(), size.height())
@@ -2053,7 +2775,7 @@ class ImageViewer(QMainWindow):
             painter.end()
 
     def save_as_pdf(self):
-        if self.current_media_type != 'image' or self.image_label.pixmap() is None: return
+        if self.current_media_type != 'image' or self.image_canvas.pixmap() is None: return
         file_path, _ = QFileDialog.getSaveFileName(self, "Save as PDF", "", "PDF Files (*.pdf)")
         if file_path:
             printer = QPrinter(QPrinter.PrinterMode.HighResolution)
@@ -2062,7 +2784,7 @@ class ImageViewer(QMainWindow):
             painter = QPainter()
             painter.begin(printer)
             rect = painter.viewport()
-            pixmap = self.image_label.pixmap()
+            pixmap = self.image_canvas.pixmap()
             size = pixmap.size()
             size.scale(rect.size(), Qt.AspectRatioMode.KeepAspectRatio)
             painter.setViewport(rect.x(), rect.y(), size.width(), size.height())
@@ -2138,7 +2860,33 @@ class ImageViewer(QMainWindow):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.current_media_type == 'image' and self.display_image is not None and self.fit_to_window:
-             self._display_image()
+            # --- MODIFIKASI: Jangan render sinkron per event; gabungkan ke refresh layar berikutnya ---
+            if not self.resize_render_timer.isActive():
+                refresh_rate = self.screen().refreshRate() if self.screen() else 60
+                self.resize_render_timer.start(max(1, int(1000 / (refresh_rate or 60))))
+            self.resize_idle_timer.start()
+
+    def _render_resize_preview(self):
+        if self.current_media_type != 'image' or self.display_image is None or not self.fit_to_window: return
+        # Preview murah: FastTransformation dari mip terdekat, tanpa scale halus
+        self.image_canvas.set_interactive(True)
+        self._display_image()
+
+    def _finish_resize(self):
+        if self.resize_render_timer.isActive():
+            self.resize_idle_timer.start()
+            return
+        if self.current_media_type == 'image' and self.display_image is not None and self.fit_to_window:
+            self._update_decode_viewport()
+            # Window membesar: decode ulang jika hasil reduksi sekarang terlalu kecil
+            if self.tiled_image is None and self.image_reduce > 1 and \
+                    pick_reduce_factor(self.image_full_size, self.decode_viewport) < self.image_reduce:
+                image, factor = self._decode_image(self.file_path)
+                if image is not None:
+                    self.cv_image = self.display_image = image
+                    self.image_reduce = factor
+            self._display_image()
+        self.image_canvas.set_interactive(False)
     
     def load_settings(self):
         geometry = self.settings.value("geometry", QByteArray())
@@ -2149,20 +2897,33 @@ class ImageViewer(QMainWindow):
         self.last_directory = self.settings.value("last_directory", "")
         filmstrip_visible = self.settings.value("filmstrip_visible", True, type=bool)
         self.filmstrip_action.setChecked(filmstrip_visible)
+        cache_budget_mb = self.settings.value("cache_budget_mb", DEFAULT_CACHE_BUDGET_MB, type=int)
+        self.image_cache.set_budget_mb(cache_budget_mb)
+        self.recent_folders = self.settings.value("recent_folders", [], type=list)
         
     def save_settings(self):
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("last_directory", self.last_directory)
         self.settings.setValue("filmstrip_visible", self.filmstrip_action.isChecked())
+        self.settings.setValue("cache_budget_mb", self.image_cache.budget_bytes // (1024 * 1024))
+        self.settings.setValue("recent_folders", self.recent_folders)
              
     def closeEvent(self, event):
         self.save_settings()
         self.stop_slideshow()
+        self.prefetcher.shutdown()
+        self.thumbnail_service.shutdown()
+        self.thumbnail_store.shutdown()
+        self._release_tiled_image()
+        self.load_executor.shutdown(wait=False, cancel_futures=True)
+        self.tile_build_executor.shutdown(wait=False, cancel_futures=True)
         if self.converter_widget and self.converter_widget.isVisible():
             self.converter_widget.close()        
         event.accept()
 
 if __name__ == '__main__':
+    # Wajib untuk process pool converter pada build PyInstaller (Windows)
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     viewer = ImageViewer()
 